@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import asyncio
+import heapq
+import timeit
+
+
+async def _nextdatetimes(datas, indices, clock):
+    # Bars of the async datas are awaited concurrently. The datetimes of the
+    # next bars are only known once every data has one pending (or is done)
+    waits = [datas[i].waitbar() for i in indices if datas[i]._async]
+    if waits:
+        await asyncio.gather(*waits)
+
+    for i in indices:
+        dt = datas[i].nextdatetime()
+        if dt is not None:
+            heapq.heappush(clock, (dt, i))
+
+
+async def runclock(cerebro, strategiesnext):
+    '''
+    Async version of the clock of Cerebro: merges the datas by the datetime
+    of their next bar, awaiting the bars of the async datas, and calls
+    strategiesnext as soon as the set of bars for a datetime is complete
+
+    The time from the arrival of the last bar of the set to the end of
+    strategiesnext is appended to cerebro.latencies
+    '''
+    datas = cerebro.datas
+    data0 = datas[0]
+
+    producers = [asyncio.ensure_future(data.produce())
+                 for data in datas if data._async]
+
+    try:
+        clock = list()
+        await _nextdatetimes(datas, range(len(datas)), clock)
+
+        while clock:
+            dt = clock[0][0]
+            moved = list()
+            while clock and clock[0][0] == dt:
+                _, i = heapq.heappop(clock)
+                data = datas[i]
+                data.advance()
+                if i:
+                    # hold datamaster points corresponding to own
+                    data.mlen.append(len(data0))
+
+                moved.append(i)
+
+            cerebro._brokernotify([datas[i] for i in moved])
+            strategiesnext()
+
+            arrivals = [datas[i].arrival for i in moved if datas[i]._async]
+            if arrivals:
+                cerebro.latencies.append(
+                    timeit.default_timer() - max(arrivals))
+
+            await _nextdatetimes(datas, moved, clock)
+
+    finally:
+        for producer in producers:
+            producer.cancel()
+
+        # let the producers run their cleanup and report their errors (ex:
+        # a connection which could not be opened)
+        results = await asyncio.gather(*producers, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and \
+               not isinstance(result, asyncio.CancelledError):
+                raise result
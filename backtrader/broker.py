@@ -21,7 +21,9 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import bisect
 import collections
+import heapq
 
 import six
 
@@ -31,6 +33,157 @@ from .metabase import MetaParams
 from .order import Order, BuyOrder, SellOrder
 
 
+class _DataPending(object):
+    # Pending orders of a single data
+    __slots__ = ('data', 'count', 'always', 'below', 'above', 'expiry',)
+
+    def __init__(self, data):
+        self.data = data
+        self.count = 0
+        self.always = dict()  # ref -> order
+        # sorted lists of (price, ref, order)
+        self.below = list()  # trigger if the bar low reaches the price
+        self.above = list()  # trigger if the bar high reaches the price
+        self.expiry = list()  # heap of (valid, ref, order)
+
+
+class PendingOrders(object):
+    '''
+    Holds the pending orders of the broker, indexed per data and by trigger
+    price, to only look in each bar at the orders which can be executed or
+    expire. Iterating yields the orders in the order they were created
+
+      - Market/Close orders and those without price are always checked
+      - Buy Limit and Sell Stop/StopLimit orders are checked when the low of
+        the bar reaches their price
+      - Sell Limit and Buy Stop/StopLimit orders are checked when the high of
+        the bar reaches their price
+      - Triggered StopLimit orders are Limit orders
+      - Orders with a "valid" date are checked once the date is surpassed
+    '''
+
+    def __init__(self):
+        self.orders = dict()  # ref -> order
+        self.datas = dict()  # id(data) -> _DataPending
+        self.index = dict()  # ref -> ladder in which the order is
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __iter__(self):
+        return iter(sorted(self.orders.values(), key=lambda x: x.ref))
+
+    def __contains__(self, order):
+        return order.ref in self.orders
+
+    def extend(self, orders):
+        for order in orders:
+            self.append(order)
+
+    def append(self, order):
+        ref = order.ref
+        self.orders[ref] = order
+
+        dpending = self.datas.get(id(order.data))
+        if dpending is None:
+            dpending = self.datas[id(order.data)] = _DataPending(order.data)
+
+        dpending.count += 1
+
+        if order.exectype != Order.Market and order.valid:
+            # stale entries (order no longer pending) are skipped when popped
+            heapq.heappush(dpending.expiry, (order.valid, ref, order))
+
+        exectype = order.exectype
+        if exectype == Order.Limit or \
+           (exectype == Order.StopLimit and order.triggered):
+            price = order.created.pricelimit
+            ladder = dpending.below if order.isbuy() else dpending.above
+        elif exectype in (Order.Stop, Order.StopLimit):
+            price = order.created.price
+            ladder = dpending.above if order.isbuy() else dpending.below
+        else:
+            price = ladder = None
+
+        if ladder is None or price is None:
+            dpending.always[ref] = order
+            ladder = None
+        else:
+            bisect.insort(ladder, (price, ref, order))
+
+        self.index[ref] = (dpending, ladder, price)
+
+    def remove(self, order):
+        ref = order.ref
+        try:
+            del self.orders[ref]
+        except KeyError:
+            raise ValueError('Order is not pending')
+
+        dpending, ladder, price = self.index.pop(ref)
+        dpending.count -= 1
+        if ladder is None:
+            del dpending.always[ref]
+        else:
+            del ladder[bisect.bisect_left(ladder, (price, ref))]
+
+    def triggerable(self, datas=None):
+        '''
+        Returns (sorted by creation) a list of (order, bar) for the orders
+        which may be executed or may expire with the current bar of their
+        data, removing them from the pending orders. bar is the tuple:
+        (open, high, low, close, previous close)
+
+        If datas is given, only the orders of those datas (the ones which
+        have delivered a new bar) are considered
+        '''
+        if datas is None:
+            dpendings = self.datas.values()
+        else:
+            dpendings = [self.datas[id(data)] for data in datas
+                         if id(data) in self.datas]
+
+        cands = list()
+        for dpending in dpendings:
+            if not dpending.count:
+                continue
+
+            data = dpending.data
+            popen, phigh, plow = data.open[0], data.high[0], data.low[0]
+            bar = (popen, phigh, plow, data.close[0], data.close[-1])
+
+            dcands = list(dpending.always.values())
+
+            below, above = dpending.below, dpending.above
+            if below:
+                ilow = bisect.bisect_left(below, (min(plow, popen),))
+                dcands.extend(entry[2] for entry in below[ilow:])
+
+            if above:
+                ihigh = bisect.bisect_right(above,
+                                            (max(phigh, popen), float('inf')))
+                dcands.extend(entry[2] for entry in above[:ihigh])
+
+            expiry = dpending.expiry
+            if expiry:
+                dt = data.datetime[0]
+                while expiry and expiry[0][0] < dt:
+                    order = heapq.heappop(expiry)[2]
+                    if order.ref in self.orders:
+                        dcands.append(order)
+
+            cands.extend((order, bar) for order in dcands)
+
+        # an order may come both from a ladder and from the expiry heap
+        byref = dict((cand[0].ref, cand) for cand in cands)
+        cands = [byref[ref] for ref in sorted(byref)]
+
+        for order, bar in cands:
+            self.remove(order)
+
+        return cands
+
+
 class BrokerBack(six.with_metaclass(MetaParams, object)):
 
     params = (('cash', 10000.0), ('commission', CommissionInfo()),)
@@ -46,11 +199,16 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
         self.startingcash = self.cash = self.p.cash
 
         self.orders = list()  # will only be appending
-        self.pending = collections.deque()  # popleft and append(right)
+        self.pending = PendingOrders()
 
         self.positions = collections.defaultdict(Position)
         self.notifs = collections.deque()
 
+        # Value of the open positions: id(data) -> [data, close, value]
+        self._posvalues = dict()
+        # running sum of the values with its compensation (Neumaier)
+        self._posvalue = self._posvaluec = 0.0
+
     def getcash(self):
         return self.cash
 
@@ -66,9 +224,11 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
     def setcommission(self, commission=0.0, margin=None, mult=1.0, name=None):
         comm = CommissionInfo(commission=commission, margin=margin, mult=mult)
         self.comminfo[name] = comm
+        self.resetvalue()
 
     def addcommissioninfo(self, comminfo, name=None):
         self.comminfo[name] = comminfo
+        self.resetvalue()
 
     def start(self):
         self.init()
@@ -88,13 +248,61 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
         return True
 
     def getvalue(self, datas=None):
-        pos_value = 0.0
-        for data in datas or self.positions.keys():
-            comminfo = self.getcommissioninfo(data)
-            position = self.positions[data]
-            pos_value += comminfo.getvalue(position, data.close[0])
-
-        return self.cash + pos_value
+        if datas:
+            pos_value = 0.0
+            for data in datas:
+                comminfo = self.getcommissioninfo(data)
+                position = self.positions[data]
+                pos_value += comminfo.getvalue(position, data.close[0])
+
+            return self.cash + pos_value
+
+        # The values of the positions are kept up to date by "next" and by
+        # the executions
+        return self.cash + (self._posvalue + self._posvaluec)
+
+    def _addvalue(self, value):
+        # compensated addition to the running sum of the position values
+        total = self._posvalue + value
+        if abs(self._posvalue) >= abs(value):
+            self._posvaluec += (self._posvalue - total) + value
+        else:
+            self._posvaluec += (value - total) + self._posvalue
+
+        self._posvalue = total
+
+    def _updatevalue(self, data, close):
+        # Calculates the value of the position in data at price close and
+        # changes the running sum by the difference with the previous one
+        position = self.positions[data]
+        if not position.size:
+            entry = self._posvalues.pop(id(data), None)
+            if not self._posvalues:
+                # no error can be left behind
+                self._posvalue = self._posvaluec = 0.0
+            elif entry is not None:
+                self._addvalue(-entry[2])
+            return
+
+        value = self.getcommissioninfo(data).getvalue(position, close)
+        entry = self._posvalues.get(id(data))
+        if entry is None:
+            self._posvalues[id(data)] = [data, close, value]
+            self._addvalue(value)
+        else:
+            self._addvalue(value)
+            self._addvalue(-entry[2])
+            entry[1:] = [close, value]
+
+    def resetvalue(self):
+        '''
+        Recalculates the value of all positions. To be called if the
+        positions are modified from outside of the broker
+        '''
+        self._posvalues = dict()
+        self._posvalue = self._posvaluec = 0.0
+        for data in list(self.positions.keys()):
+            self._updatevalue(data, data.close[0])
 
     def getposition(self, data):
         return self.positions[data]
@@ -129,6 +337,7 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
         position = self.positions[order.data]
         psize, pprice, opened, closed = position.update(size, price)
         abopened, abclosed = abs(opened), abs(closed)
+        self._updatevalue(order.data, order.data.close[0])
 
         # Get comminfo object for the data
         comminfo = self.getcommissioninfo(order.data)
@@ -173,63 +382,54 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
     def notify(self, order):
         self.notifs.append(order)
 
-    def next(self):
-        for data, pos in self.positions.items():
-            # futures change cash in the broker in every bar
-            # to ensure margin requirements are met
+    def next(self, datas=None):
+        '''
+        Values the positions and checks the pending orders of datas: the
+        datas which have delivered a new bar (all datas if None). The others
+        have still the bar which was already seen
+        '''
+        if datas is None:
+            entries = list(self._posvalues.values())
+        else:
+            entries = [self._posvalues[id(data)] for data in datas
+                       if id(data) in self._posvalues]
+
+        for entry in entries:
+            data = entry[0]
+            close = data.close[0]
+            # futures change cash in the broker in every bar to ensure margin
+            # requirements are met. The change is from the last close the
+            # position was valued at
             comminfo = self.getcommissioninfo(data)
-            self.cash += comminfo.cashadjust(pos.size,
-                                             data.close[-1],
-                                             data.close[0])
+            self.cash += comminfo.cashadjust(self.positions[data].size,
+                                             entry[1], close)
 
-        # Iterate once over all elements of the pending queue
-        for i in range(len(self.pending)):
-            order = self.pending.popleft()
+            # only the positions whose price has changed are valued again
+            if close != entry[1]:
+                self._updatevalue(data, close)
 
+        # Only the orders which the bar of their data can execute or expire
+        for order, bar in self.pending.triggerable(datas):
             if order.expire():
                 self.notify(order)
                 continue
 
-            plow = order.data.low[0]
-            phigh = order.data.high[0]
-            popen = order.data.open[0]
-            pclose = order.data.close[0]
-            pclose1 = order.data.close[-1]
-            pcreated = order.created.price
-            plimit = order.created.pricelimit
-
-            if order.exectype == Order.Market:
-                self._execute(order, order.data.datetime[0], price=popen)
-
-            elif order.exectype == Order.Close:
-                self._try_exec_close(order, pclose1)
-
-            elif order.exectype == Order.Limit:
-                self._try_exec_limit(order, popen, phigh, plow, plimit)
-
-            elif order.exectype == Order.StopLimit and order.triggered:
-                self._try_exec_limit(order, popen, phigh, plow, plimit)
-
-            elif order.exectype == Order.Stop:
-                self._try_exec_stop(order, popen, phigh, plow, pcreated)
-
-            elif order.exectype == Order.StopLimit:
-                self._try_exec_stoplimit(order,
-                                         popen, phigh, plow, pclose,
-                                         pcreated, plimit)
+            self._dispatch[order.exectype](self, order, *bar)
 
             if order.alive():
                 self.pending.append(order)
 
-    def _try_exec_close(self, order, pclose):
-        if order.data.datetime.time(0) != order.data.datetime.time(-1):
-            # intraday: time changes in between bars
-            self._execute(order, order.data.datetime[-1], price=pclose)
-        elif order.data.datetime.date(0) != order.data.datetime.date(-1):
-            # daily: time is equal, date changes
-            self._execute(order, order.data.datetime[-1], price=pclose)
+    def _try_exec_market(self, order, popen, phigh, plow, pclose, pclose1):
+        self._execute(order, order.data.datetime[0], price=popen)
+
+    def _try_exec_close(self, order, popen, phigh, plow, pclose, pclose1):
+        # intraday the time changes in between bars and daily the date
+        dtime = order.data.datetime
+        if dtime.ordtime(0) != dtime.ordtime(-1):
+            self._execute(order, dtime[-1], price=pclose1)
 
-    def _try_exec_limit(self, order, popen, phigh, plow, plimit):
+    def _try_exec_limit(self, order, popen, phigh, plow, pclose, pclose1):
+        plimit = order.created.pricelimit
         if isinstance(order, BuyOrder):
             if plimit >= popen:
                 # open smaller/equal than requested - buy cheaper
@@ -246,7 +446,8 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
                 # day high above req price ... match limit price
                 self._execute(order, order.data.datetime[0], price=plimit)
 
-    def _try_exec_stop(self, order, popen, phigh, plow, pcreated):
+    def _try_exec_stop(self, order, popen, phigh, plow, pclose, pclose1):
+        pcreated = order.created.price
         if isinstance(order, BuyOrder):
             if popen >= pcreated:
                 # price penetrated with an open gap - use open
@@ -264,8 +465,14 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
                 self._execute(order, order.data.datetime[0], price=pcreated)
 
     def _try_exec_stoplimit(self, order,
-                            popen, phigh, plow, pclose,
-                            pcreated, plimit):
+                            popen, phigh, plow, pclose, pclose1):
+        if order.triggered:
+            # once triggered it is a limit order
+            self._try_exec_limit(order, popen, phigh, plow, pclose, pclose1)
+            return
+
+        pcreated = order.created.price
+        plimit = order.created.pricelimit
         if isinstance(order, BuyOrder):
             if popen >= pcreated:
                 order.triggered = True
@@ -293,7 +500,7 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
             if popen <= pcreated:
                 # price penetrated downwards with an open gap
                 order.triggered = True
-                if plimit <= open:
+                if plimit <= popen:
                     self._execute(order, order.data.datetime[0], price=popen)
                 elif plimit <= phigh:
                     # execute in same bar
@@ -313,3 +520,12 @@ class BrokerBack(six.with_metaclass(MetaParams, object)):
                     # popen > pclose
                     if plimit <= pcreated:
                         self._execute(order, dt, price=pcreated)
+
+    # exectype -> execution check
+    _dispatch = {
+        Order.Market: _try_exec_market,
+        Order.Close: _try_exec_close,
+        Order.Limit: _try_exec_limit,
+        Order.Stop: _try_exec_stop,
+        Order.StopLimit: _try_exec_stoplimit,
+    }
@@ -21,37 +21,134 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import collections
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
+import heapq
 import itertools
+import multiprocessing
+import os.path
+import sys
 
 import six
 from six.moves import xrange
 
 from .broker import BrokerBack
+from .checkpoint import Checkpoint
+from .indicator import IndicatorCache
 from .metabase import MetaParams
+from .profiler import Profiler
+from .utils.npsupport import np
+
+
+class OptReturn(object):
+    '''
+    Picklable summary of a strategy which has been run in a worker process
+    during an optimization with maxcpus different from 1
+
+    Attributes:
+        params (OrderedDict): parameters the strategy was instantiated with
+        value (float): broker value at the end of the run
+        cash (float): broker cash at the end of the run
+        profile (ProfileNode): profile of the run if profiling was active
+    '''
+    def __init__(self, params, **kwargs):
+        self.p = self.params = params
+        for key, val in kwargs.items():
+            setattr(self, key, val)
+
+
+# Cerebro instance inherited by the worker processes of an optimization
+_optcerebro = None
+
+
+def _optworker(idx):
+    return _optcerebro._runoptcombination(idx)
 
 
 class Cerebro(six.with_metaclass(MetaParams, object)):
+    '''
+    Params:
+      - preload: preload the data feeds before the strategies are run
+      - runonce: run indicators in batch mode (needs preload)
+      - lookahead: extra positions to extend the data buffers with
+      - maxcpus: number of processes used to run the combinations of an
+        optimization. 1 runs them serially in this process and None (or 0)
+        uses as many processes as cores are available
+      - indcache: maximum size in bytes of the cache which lets indicators
+        with the same class, params and input lines reuse the values
+        calculated in a previous run (runonce mode only). 0 deactivates it
+      - savemem: keep in the line buffers only the values which can still be
+        looked at by the consumers of each line, so that memory does not grow
+        with the number of bars. It forces next mode (no preloading) and
+        leaves nothing to be plotted. Looking further back than the minimum
+        periods raises IndexError unless the strategy makes room for it
+        with minbuffer (ex: self.data.close.minbuffer(21) to read [-20])
+      - vectorize: run the batch (runonce) calculations of line operations,
+        logic functions and basic indicators with numpy over whole slices.
+        Ignored if numpy is not installed
+      - profile: record the wall time and number of calls of the calculations
+        of each strategy and of the indicators, line operations and observers
+        under it. The tree of ProfileNode is left in the attribute profile of
+        each strategy returned by run
+      - fuse: inline the chains of line operations created by the arithmetic
+        operators (like abs(a / b - c)) which have a single consumer into
+        it, which calculates the whole expression with a compiled kernel and
+        without the buffers of the intermediate results. Operations
+        referenced by anything else (attributes, closures, containers) are
+        kept. None (default) fuses the operations inside indicators and
+        observers, True also those of the strategies and False none
+      - checkpoint: name of a file to which the state of the run is written
+        every checkpointbars datetimes, to let resume continue the run from
+        there. It forces next mode (runonce is not used)
+      - checkpointbars: datetimes in between checkpoints
+
+    Datas with bars produced by asyncio coroutines (like feeds.SocketData)
+    are awaited concurrently and are never preloaded. The seconds from the
+    arrival of their bars to the end of the strategies' next calls are kept
+    in the attribute latencies (one entry per datetime)
+    '''
 
     params = (
         ('preload', True),
         ('runonce', True),
         ('lookahead', 0),
+        ('maxcpus', 1),
+        ('indcache', 0),
+        ('savemem', False),
+        ('vectorize', False),
+        ('profile', False),
+        ('fuse', None),
+        ('checkpoint', None),
+        ('checkpointbars', 1000),
     )
 
     def __init__(self):
         self.feeds = list()
         self.datas = list()
         self.strats = list()
+        self.runstrats = list()
+        self._dooptimize = False
+        self._datasloaded = False
+        self.latencies = list()
+        self._resumestate = None
         self._broker = BrokerBack()
 
+        self._vectorize = self.p.vectorize and np is not None
+        self._fuse = self.p.fuse
+
+        self._indcache = None
+        if self.p.indcache:
+            self._indcache = IndicatorCache(self.p.indcache)
+
     @staticmethod
     def iterize(iterable):
         niterable = list()
         for elem in iterable:
             if isinstance(elem, six.string_types):
                 elem = (elem,)
-            elif not isinstance(elem, collections.Iterable):
+            elif not isinstance(elem, Iterable):
                 elem = (elem,)
 
             niterable.append(elem)
@@ -62,6 +159,7 @@ class Cerebro(six.with_metaclass(MetaParams, object)):
         if name is not None:
             data._name = name
         self.datas.append(data)
+        self._datasloaded = False
         feed = data.getfeed()
         if feed and feed not in self.feeds:
             self.feeds.append(feed)
@@ -82,6 +180,7 @@ class Cerebro(six.with_metaclass(MetaParams, object)):
 
         it = itertools.product([strategy], optargs, optkwargs)
         self.strats.append(it)
+        self._dooptimize = True
 
     def addstrategy(self, strategy, *args, **kwargs):
         self.strats.append([(strategy, args, kwargs)])
@@ -106,41 +205,168 @@ class Cerebro(six.with_metaclass(MetaParams, object)):
         plotter.show()
 
     def run(self):
+        '''
+        Runs the backtest for each combination of the added strategies
+
+        Returns:
+          - Without optimization: the list of strategies which were run
+          - With optimization: a list of lists, holding the strategies of
+            each combination in the order the combinations were generated
+            (``results[i][j]`` is strategy j of combination i). If the
+            combinations were run in worker processes (maxcpus different from
+            1) the strategies are returned as OptReturn instances
+
+        The workers are forked processes. Where fork is not available the
+        combinations are run serially in this process
+        '''
         if not self.datas:
-            return
+            return []
+
+        iterstrats = list(itertools.product(*self.strats))
+
+        maxcpus = self.p.maxcpus or multiprocessing.cpu_count()
+        ctx = self._forkcontext()
+        if maxcpus > 1 and len(iterstrats) > 1 and ctx is not None:
+            return self._runparallel(ctx, iterstrats, maxcpus)
+
+        results = list()
+        for iterstrat in iterstrats:
+            results.append(self.runstrategies(iterstrat))
+
+        if self._dooptimize:
+            return results
+
+        return self.runstrats
+
+    def resume(self):
+        '''
+        Like run but continuing from the last checkpoint written to the file
+        given with the param checkpoint (if any) by a previous run with the
+        same set up of datas and strategies
+        '''
+        if self.p.checkpoint and os.path.exists(self.p.checkpoint):
+            self._resumestate = Checkpoint.read(self.p.checkpoint)
+
+        try:
+            return self.run()
+        finally:
+            self._resumestate = None
+
+    def update(self):
+        '''
+        Continues the last (preloaded) run over the bars which have become
+        available in the datas since it finished (for example appended to the
+        files). Only the new positions of the indicators are calculated and
+        the strategies (whose stop is called again) only see the new bars
+
+        Returns the strategies of the run
+        '''
+        if not self._datasloaded or not self.runstrats:
+            raise ValueError('update needs a previous run with preloaded '
+                             'datas and no optimization')
+
+        for data in self.datas:
+            data.preloadmore()
+
+        if self.params.runonce and not self.params.checkpoint:
+            for strat in self.runstrats:
+                strat._oncemore()
+
+            def strategiesnext():
+                for strat in self.runstrats:
+                    strat._oncepost()
+
+            self._runclock(strategiesnext, preloaded=True)
+        else:
+            self._runnext(preloaded=True)
+
+        for strat in self.runstrats:
+            strat.stop()
+
+        return self.runstrats
+
+    def runstrategies(self, iterstrat):
+        '''
+        Runs a single combination of strategies (class, args, kwargs) over
+        the added datas and returns the created strategies
+        '''
+        self.runstrats = list()
+
+        self._broker.start()
 
-        for iterstrat in itertools.product(*self.strats):
-            self.runstrats = list()
+        # live (async) datas cannot be preloaded
+        live = any(data._async for data in self.datas)
+        preload = self.params.preload and not self.params.savemem and not live
+        runonce = preload and self.params.runonce and \
+            not self.params.checkpoint
 
-            self._broker.start()
+        # Preloaded datas are kept from a previous combination of an
+        # optimization and need only be rewound
+        loaddatas = not (preload and self._datasloaded)
 
+        if loaddatas:
             for feed in self.feeds:
                 feed.start()
 
             for data in self.datas:
                 data.reset()
+                if self.params.savemem:
+                    # room for [-1] and the bar the clock loads in advance
+                    data.qbuffer(extrasize=2)
                 data.extend(size=self.params.lookahead)
                 data.start()
-                if self.params.preload:
-                    data.preload()
+                if preload and self._resumestate is None:
+                    data.preload()  # values are restored when resuming
 
-            for stratcls, sargs, skwargs in iterstrat:
-                sargs = self.datas + list(sargs)
-                strat = stratcls(self, *sargs, **skwargs)
-                self.runstrats.append(strat)
+            self._datasloaded = preload
 
-            # loop separated for clarity
-            for strat in self.runstrats:
-                strat.start()
+            # cached values refer to the previously loaded datas
+            if self._indcache is not None:
+                self._indcache.clear()
+        else:
+            for data in self.datas:
+                data.rehome()
+
+        for stratcls, sargs, skwargs in iterstrat:
+            sargs = self.datas + list(sargs)
+            strat = stratcls(self, *sargs, **skwargs)
+            self.runstrats.append(strat)
 
-            if self.params.preload and self.params.runonce:
-                self._runonce()
-            else:
-                self._runnext()
+        if self.params.savemem:
+            for strat in self.runstrats:
+                strat.qbuffer()
 
+        if self.params.profile:
+            profiler = Profiler()
             for strat in self.runstrats:
-                strat.stop()
+                strat.profile = profiler.profile(strat)
+
+        # loop separated for clarity
+        for strat in self.runstrats:
+            strat.start()
+
+        checkpoint = None
+        if self.params.checkpoint:
+            checkpoint = Checkpoint(self, self.params.checkpoint,
+                                    self.params.checkpointbars)
+            if self._resumestate is not None:
+                checkpoint.load(self._resumestate)
+                self._resumestate = None
+
+        if runonce:
+            self._runonce()
+        elif live:
+            self.latencies = list()
+            self._runasync()
+        elif not preload and any(data._follower for data in self.datas):
+            self._runnextmaster(checkpoint)
+        else:
+            self._runnext(preload, checkpoint)
 
+        for strat in self.runstrats:
+            strat.stop()
+
+        if loaddatas:
             for data in self.datas:
                 data.stop()
 
@@ -149,23 +375,143 @@ class Cerebro(six.with_metaclass(MetaParams, object)):
 
         return self.runstrats
 
-    def _brokernotify(self):
-        self._broker.next()
+    @staticmethod
+    def _forkcontext():
+        # Only forked workers inherit _optcerebro: spawned ones would see None
+        if hasattr(multiprocessing, 'get_context'):
+            try:
+                return multiprocessing.get_context('fork')
+            except ValueError:
+                return None  # platform without fork
+
+        return None if sys.platform == 'win32' else multiprocessing
+
+    def _runparallel(self, ctx, iterstrats, maxcpus):
+        # The workers are forked and inherit this instance (and with it the
+        # datas) once. Only the index of each combination is sent to them
+        # and a picklable summary of each strategy is sent back
+        global _optcerebro
+
+        ncombs = len(iterstrats)
+        processes = min(maxcpus, ncombs)
+        chunksize = max(1, ncombs // (processes * 4))
+
+        self._iterstrats = iterstrats
+        _optcerebro = self
+        pool = ctx.Pool(processes)
+        try:
+            results = pool.map(_optworker, xrange(ncombs), chunksize)
+        finally:
+            pool.close()
+            pool.join()
+            _optcerebro = None
+            self._iterstrats = None
+
+        self.runstrats = list()
+        return results
+
+    def _runoptcombination(self, idx):
+        runstrats = self.runstrategies(self._iterstrats[idx])
+
+        optreturns = list()
+        for strat in runstrats:
+            optret = OptReturn(strat.params._getkwargs(),
+                               value=self._broker.getvalue(),
+                               cash=self._broker.getcash(),
+                               profile=strat.profile)
+            optreturns.append(optret)
+
+        return optreturns
+
+    def _brokernotify(self, datas=None):
+        # datas: those which delivered a new bar (None for all)
+        self._broker.next(datas)
         while self._broker.notifs:
             order = self._broker.notifs.popleft()
             order.owner._addnotification(order)
 
-    def _runnext(self):
+    def _runclock(self, strategiesnext, preloaded):
+        # Merge the datas by the datetime of their next bar. Only the datas
+        # which have a bar at the current datetime are moved forward, to
+        # support datas with different trading calendars
+        datas = self.datas
+        data0 = datas[0]
+
+        clock = list()
+        load = not preloaded
+        for i, data in enumerate(datas):
+            dt = data.nextdatetime(load)
+            if dt is not None:
+                clock.append((dt, i))
+
+        heapq.heapify(clock)
+
+        while clock:
+            dt = clock[0][0]
+            moved = list()
+            while clock and clock[0][0] == dt:
+                _, i = heapq.heappop(clock)
+                data = datas[i]
+                data.advance()
+                moved.append(data)
+                if i:
+                    # hold datamaster points corresponding to own
+                    data.mlen.append(len(data0))
+
+                dt2 = data.nextdatetime(load)
+                if dt2 is not None:
+                    heapq.heappush(clock, (dt2, i))
+
+            self._brokernotify(moved)
+            strategiesnext()
+
+    def _runnextmaster(self, checkpoint=None):
+        # Resampled/replayed datas are built bar by bar from other datas and
+        # have to be moved after them: the 1st data is the master clock
         data0 = self.datas[0]
         while data0.next():
+            # a data which cannot deliver yet is rewound and a replayed one
+            # updates the bar in place (only the datetime changes)
+            moved = [data0]
             for data in self.datas[1:]:
+                last = len(data) and (len(data), data.datetime[0])
                 data.next(datamaster=data0)
+                if (len(data) and (len(data), data.datetime[0])) != last:
+                    moved.append(data)
+
+            self._brokernotify(moved)
+
+            for strat in self.runstrats:
+                strat._next()
+
+            if checkpoint is not None:
+                checkpoint.next()
+
+    def _runasync(self):
+        # Python 3 only: the module uses the syntax of coroutines
+        import asyncio
+        from .asyncrun import runclock
+
+        def strategiesnext():
+            for strat in self.runstrats:
+                strat._next()
 
-            self._brokernotify()
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(runclock(self, strategiesnext))
+        finally:
+            loop.close()
 
+    def _runnext(self, preloaded, checkpoint=None):
+        def strategiesnext():
             for strat in self.runstrats:
                 strat._next()
 
+            if checkpoint is not None:
+                checkpoint.next()
+
+        self._runclock(strategiesnext, preloaded)
+
     def _runonce(self):
         for strat in self.runstrats:
             strat._once()
@@ -174,14 +520,8 @@ class Cerebro(six.with_metaclass(MetaParams, object)):
         # has not moved forward all datas/indicators/observers that
         # were homed before calling once, Hence no "need" to do it
         # here again, because pointers are at 0
-        data0 = self.datas[0]
-        datas = self.datas[1:]
-        for i in xrange(data0.buflen()):
-            data0.advance()
-            for data in datas:
-                data.advance(data0)
-
-            self._brokernotify()
-
+        def strategiesnext():
             for strat in self.runstrats:
                 strat._oncepost()
+
+        self._runclock(strategiesnext, preloaded=True)
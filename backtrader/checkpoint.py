@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+
+from six.moves import cPickle as pickle
+
+from .datapos import Position
+from .lineiterator import LineIterator
+
+
+class Checkpoint(object):
+    '''
+    Writes the state of a running cerebro to a file every checkpointbars
+    datetimes and restores it in a new (but identically set up) cerebro to
+    let the run be resumed
+
+    The state is made up of:
+      - the lines (values and pointers) of datas, strategies, indicators,
+        line actions and observers and the state kept out of the lines by
+        them (see savestate/loadstate), such as file offsets of the datas
+      - cash, positions and orders of the broker
+    '''
+    version = 1
+
+    def __init__(self, cerebro, filename, checkpointbars=1):
+        self.cerebro = cerebro
+        self.filename = filename
+        self.checkpointbars = checkpointbars
+        self.bars = 0
+
+    @staticmethod
+    def _walk(lineiterator):
+        # The objects are created in the same order by identical runs
+        yield lineiterator
+        for ltype in (LineIterator.IndType, LineIterator.ObsType):
+            for child in lineiterator._lineiterators[ltype]:
+                if isinstance(child, LineIterator):
+                    for obj in Checkpoint._walk(child):
+                        yield obj
+                else:
+                    yield child  # line actions
+
+    def _objects(self):
+        objs = list(self.cerebro.datas)
+        for strat in self.cerebro.runstrats:
+            objs.extend(self._walk(strat))
+
+        return objs
+
+    def next(self):
+        self.bars += 1
+        if not self.bars % self.checkpointbars:
+            self.save()
+
+    def save(self):
+        cerebro = self.cerebro
+        broker = cerebro.broker
+        datas = cerebro.datas
+        strats = cerebro.runstrats
+
+        # lines overload ==: indices are looked up by identity
+        dataids = self._ids(datas)
+        stratids = self._ids(strats)
+
+        orders = broker.orders
+        orderids = self._ids(orders)
+
+        state = dict(
+            version=self.version,
+            bars=self.bars,
+            objects=[obj.savestate() for obj in self._objects()],
+            cash=broker.cash,
+            startingcash=broker.startingcash,
+            positions=[(dataids[id(data)], pos.size, pos.price)
+                       for data, pos in broker.positions.items()],
+            orders=[self._saveorder(order, dataids, stratids)
+                    for order in orders],
+            pending=[orderids[id(order)] for order in broker.pending],
+            notifs=[orderids[id(order)] for order in broker.notifs],
+            stratorders=[[orderids[id(order)] for order in strat._orders]
+                         for strat in strats],
+        )
+
+        # a process dying while writing must not destroy the last checkpoint
+        tmpname = self.filename + '.tmp'
+        with open(tmpname, 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+
+        replace = getattr(os, 'replace', None)
+        if replace is not None:
+            replace(tmpname, self.filename)
+        else:
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(tmpname, self.filename)
+
+    @staticmethod
+    def _ids(objs):
+        return dict((id(obj), i) for i, obj in enumerate(objs))
+
+    @staticmethod
+    def _saveorder(order, dataids, stratids):
+        params = order._getkwargs()
+        owner = params.pop('owner')
+        data = params.pop('data')
+
+        return dict(
+            cls=order.__class__,
+            owner=stratids.get(id(owner)),
+            data=dataids[id(data)],
+            params=params,
+            status=order.status,
+            created=order.created,
+            executed=order.executed,
+            position=order.position,
+        )
+
+    @staticmethod
+    def read(filename):
+        with open(filename, 'rb') as f:
+            state = pickle.load(f)
+
+        if state.get('version') != Checkpoint.version:
+            raise ValueError('Unsupported checkpoint file %s' % filename)
+
+        return state
+
+    def load(self, state):
+        cerebro = self.cerebro
+        broker = cerebro.broker
+        datas = cerebro.datas
+        strats = cerebro.runstrats
+
+        objs = self._objects()
+        if len(objs) != len(state['objects']):
+            raise ValueError('The checkpoint does not match the set up of '
+                             'datas and strategies')
+
+        for obj, objstate in zip(objs, state['objects']):
+            obj.loadstate(objstate)
+
+        self.bars = state['bars']
+
+        broker.cash = state['cash']
+        broker.startingcash = state['startingcash']
+        for dataidx, size, price in state['positions']:
+            broker.positions[datas[dataidx]] = Position(size, price)
+
+        broker.resetvalue()
+
+        orders = [self._loadorder(ostate, datas, strats)
+                  for ostate in state['orders']]
+
+        broker.orders = orders
+        broker.pending.extend(orders[i] for i in state['pending'])
+        broker.notifs.extend(orders[i] for i in state['notifs'])
+        for strat, stratorders in zip(strats, state['stratorders']):
+            strat._orders = [orders[i] for i in stratorders]
+
+    @staticmethod
+    def _loadorder(ostate, datas, strats):
+        owner = ostate['owner']
+        params = ostate['params']
+        order = ostate['cls'](
+            owner=strats[owner] if owner is not None else None,
+            data=datas[ostate['data']],
+            **params)
+
+        # __init__ changes the sign of the size of sell orders
+        order.size = params['size']
+        order.status = ostate['status']
+        order.created = ostate['created']
+        order.executed = ostate['executed']
+        order.position = ostate['position']
+        return order
@@ -35,6 +35,8 @@ class Position(object):
     is not null
     '''
 
+    __slots__ = ('size', 'price',)
+
     def __init__(self, size=0, price=0.0):
         self.size = size
         self.price = price
@@ -21,15 +21,22 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
 import datetime
+import hashlib
+import json
+import os
 import os.path
+import sys
 
 import six
 
 from . import dataseries
+from . import linebuffer
 from . import metabase
 from . import TimeFrame
 from .utils import date2num
+from .utils.npsupport import np
 
 
 class MetaDataBase(dataseries.OHLCDateTime.__class__):
@@ -71,12 +78,24 @@ class MetaDataBase(dataseries.OHLCDateTime.__class__):
         # hold datamaster points corresponding to own
         _obj.mlen = list()
 
+        # identify the values of the lines for the indicator cache
+        _obj._cachekey = ('data', id(_obj))
+        for i, line in enumerate(_obj.lines):
+            line._cachekey = (_obj._cachekey, i)
+
         return _obj, args, kwargs
 
 
 class DataBase(six.with_metaclass(MetaDataBase, dataseries.OHLCDateTime)):
     _feed = None
 
+    # Datas whose bars are built from the bars of another data can only load
+    # a bar after that data has moved and cannot be loaded in advance
+    _follower = False
+
+    # Datas whose bars are produced by an asyncio coroutine (live datas)
+    _async = False
+
     params = (('dataname', None),
               ('fromdate', datetime.datetime.min),
               ('todate', datetime.datetime.max),
@@ -138,11 +157,97 @@ class DataBase(six.with_metaclass(MetaDataBase, dataseries.OHLCDateTime)):
         # tell the world there is a bar (either the new or the previous
         return True
 
+    def nextdatetime(self, load=True):
+        '''
+        Returns the datetime of the next bar without delivering it or None if
+        there are no more bars. If not preloaded (and load is True) the bar is
+        loaded and kept pending until the data is advanced
+        '''
+        if len(self) == self.buflen():
+            if not load or not self.load():
+                return None
+
+            self.rewind()  # keep the loaded bar pending
+
+        return self.lines.datetime[1]
+
     def preload(self):
-        while self.load():
-            pass
+        if not self._preloadbulk():
+            while self.load():
+                pass
+
+        self.home()
+
+    def _preloadbulk(self):
+        '''
+        To be overriden by subclasses which can load all bars at once (see
+        _loadbulk). Returns False if the bars have not been loaded, to let
+        them be loaded one by one
+        '''
+        return False
 
+    def _loadbulk(self, columns):
+        '''
+        Adds (as load does bar by bar) the bars given in columns: a dict of
+        line names to numpy arrays of the same length. Bars before fromdate
+        are skipped and the first bar after todate ends the loading. Lines
+        with no column get NaN
+        '''
+        dts = columns['datetime']
+        after = np.flatnonzero(dts > self.todate)
+        if len(after):
+            columns = dict((k, v[:after[0]]) for k, v in columns.items())
+            dts = columns['datetime']
+
+        keep = dts >= self.fromdate
+        if not keep.all():
+            columns = dict((k, v[keep]) for k, v in columns.items())
+
+        nbars = int(keep.sum())
+        for i, line in enumerate(self.lines):
+            column = columns.get(self._getlinealias(i))
+            if column is None:
+                column = np.full(nbars, float('NaN'))
+
+            column = np.ascontiguousarray(column, dtype=np.float64)
+            line.forwardvalues(array.array(str('d'), column.tobytes()))
+
+        return nbars
+
+    def preloadmore(self):
+        '''
+        Loads after the preloaded bars those which have become available
+        since then (for example appended to a file) leaving the data pointer
+        where it was. Returns the number of new bars
+        '''
+        pos = len(self)
+        self.lines.advance(self.buflen() - pos)  # to the last loaded bar
+
+        newbars = 0
+        while self.load():
+            newbars += 1
+
+        self.lines.rewind(len(self) - pos)
+        return newbars
+
+    def rehome(self):
+        '''
+        Rewinds an already preloaded data to its beginning to let it be run
+        again (for example by the next combination of an optimization)
+        without loading it again
+        '''
+        self._stage1()
         self.home()
+        self.mlen = list()
+
+    def savestate(self):
+        state = super(DataBase, self).savestate()
+        state['mlen'] = list(self.mlen)
+        return state
+
+    def loadstate(self, state):
+        super(DataBase, self).loadstate(state)
+        self.mlen = list(state['mlen'])
 
     def load(self):
         while True:
@@ -190,7 +295,8 @@ class FeedBase(six.with_metaclass(metabase.MetaParams, object)):
             kwargs.setdefault(pname, getattr(self.p, pname))
 
         kwargs['dataname'] = dataname
-        data = self._getdata(**kwargs)
+        with metabase.ownercontext(self):
+            data = self._getdata(**kwargs)
 
         data._name = name
 
@@ -217,7 +323,21 @@ class MetaCSVDataBase(DataBase.__class__):
 
 
 class CSVDataBase(six.with_metaclass(MetaCSVDataBase, DataBase)):
-    params = (('headers', True), ('separator', ','),)
+    '''
+    Params:
+      - headers: the 1st line of the file holds the headers and is skipped
+      - separator: separator of the fields in a line
+      - cache: preloading writes the parsed lines to a cache file next to the
+        file, which later preloads read instead of parsing the file. The cache
+        is only used with the same file (path, modification time and size) and
+        the same parameters
+    '''
+    params = (('headers', True), ('separator', ','), ('cache', False),)
+
+    f = None
+    _offset = None  # position in the file after the last line read
+
+    cacheversion = 2
 
     def start(self):
         if hasattr(self.p.dataname, 'readline'):
@@ -231,9 +351,136 @@ class CSVDataBase(six.with_metaclass(MetaCSVDataBase, DataBase)):
 
     def stop(self):
         if self.f is not None:
+            self._offset = self.f.tell()
             self.f.close()
             self.f = None
 
+    def preload(self):
+        cache = self._cachefile()
+        if cache is not None and self._loadcache(*cache):
+            self.home()
+            return
+
+        super(CSVDataBase, self).preload()
+
+        if cache is not None:
+            self._savecache(*cache)
+
+    def _cachefile(self):
+        '''
+        Returns (filename, key) for the cache of the parsed lines or None if
+        no cache can be used
+        '''
+        dataname = self.p.dataname
+        if not self.p.cache or hasattr(dataname, 'readline') or \
+           self.lines.datetime.mode != linebuffer.LineBuffer.UnBounded:
+            return None
+
+        try:
+            stat = os.stat(dataname)
+        except OSError:
+            return None
+
+        params = [(pname, pvalue)
+                  for pname, pvalue in self.p._getkwargs().items()
+                  if pname not in ('name', 'cache')]
+
+        key = repr((self.cacheversion,
+                    self.__class__.__module__, self.__class__.__name__,
+                    os.path.abspath(dataname), stat.st_mtime, stat.st_size,
+                    params))
+
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return '%s.%s.btcache' % (dataname, digest), key
+
+    # Cache file: a line with a json header (key, offset of the file after
+    # the parsing, number of bars) followed by the values of each line as
+    # little endian doubles. Nothing in it is executed when read
+    def _loadcache(self, filename, key):
+        try:
+            with open(filename, 'rb') as f:
+                header = json.loads(f.readline().decode('utf-8'))
+                if not isinstance(header, dict) or header.get('key') != key:
+                    return False
+
+                offset, nbars = header['offset'], header['nbars']
+                columns = list()
+                for line in self.lines:
+                    column = array.array(str('d'))
+                    column.fromfile(f, nbars)
+                    if sys.byteorder != 'little':
+                        column.byteswap()
+                    columns.append(column)
+
+                if f.read(1):
+                    return False  # more lines than this data has
+        except (IOError, OSError, EOFError, ValueError, KeyError, TypeError):
+            return False
+
+        for line, values in zip(self.lines, columns):
+            line.forwardvalues(values)
+
+        if self.f is not None and offset is not None:
+            self.f.seek(offset)  # as if the file had been read
+
+        return True
+
+    def _savecache(self, filename, key):
+        header = dict(
+            key=key,
+            offset=self.f.tell() if self.f is not None else None,
+            nbars=self.buflen(),
+        )
+
+        # concurrent readers must never see a partially written file
+        tmpname = '%s.%d.tmp' % (filename, os.getpid())
+        try:
+            try:
+                with open(tmpname, 'wb') as f:
+                    f.write(json.dumps(header).encode('utf-8') + b'\n')
+                    for line in self.lines:
+                        column = array.array(str('d'),
+                                             line.array[:line.buflen()])
+                        if sys.byteorder != 'little':
+                            column.byteswap()
+                        column.tofile(f)
+
+                replace = getattr(os, 'replace', None)
+                if replace is not None:
+                    replace(tmpname, filename)
+                else:
+                    if os.path.exists(filename):
+                        os.remove(filename)
+                    os.rename(tmpname, filename)
+            finally:
+                if os.path.exists(tmpname):
+                    os.remove(tmpname)  # not renamed: the write failed
+        except (IOError, OSError):
+            pass  # the cache is optional (ex: read-only location)
+
+    def preloadmore(self):
+        if self.f is None and self._offset is not None and \
+           not hasattr(self.p.dataname, 'readline'):
+            # reopen the file where the last read finished
+            self.f = open(self.p.dataname, 'rb')
+            self.f.seek(self._offset)
+
+        try:
+            return super(CSVDataBase, self).preloadmore()
+        finally:
+            self.stop()
+
+    def savestate(self):
+        state = super(CSVDataBase, self).savestate()
+        # position of the 1st line not yet loaded
+        state['offset'] = self.f.tell() if self.f is not None else None
+        return state
+
+    def loadstate(self, state):
+        super(CSVDataBase, self).loadstate(state)
+        if self.f is not None and state['offset'] is not None:
+            self.f.seek(state['offset'])
+
     def _load(self):
         if self.f is None:
             return False
@@ -21,6 +21,14 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import sys
+
 from .btcsv import *
 from .vchartcsv import *
 from .yahoo import *
+
+if sys.version_info >= (3, 5):
+    # the syntax of coroutines is not available in earlier versions
+    from .asyncfeed import *
+    # memoryview.cast and os.replace are not available in earlier versions
+    from .mmapfeed import *
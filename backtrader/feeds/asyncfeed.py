@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import asyncio
+import collections
+import timeit
+
+from .. import feed
+from .btcsv import BacktraderCSVData
+
+
+class AsyncData(feed.DataBase):
+    '''
+    Base class for live datas whose bars are produced by an asyncio coroutine
+
+    Subclasses implement the coroutine _produce, which hands each bar over
+    with _putbar as soon as it arrives, and _loadline to put a bar in the
+    lines. Cerebro awaits the bars of all async datas concurrently
+
+    Attributes:
+      - arrival: timer value (timeit.default_timer) at which the current bar
+        arrived
+    '''
+    _async = True
+
+    timer = staticmethod(timeit.default_timer)
+
+    def start(self):
+        super(AsyncData, self).start()
+        self._bars = collections.deque()
+        self._done = False
+        self._newbar = None
+        self.arrival = None
+
+    def _putbar(self, bar):
+        self._bars.append((self.timer(), bar))
+        if self._newbar is not None:
+            self._newbar.set()
+
+    async def produce(self):
+        '''Runs the producer and signals when no more bars will arrive'''
+        self._newbar = asyncio.Event()
+        try:
+            await self._produce()
+        finally:
+            self._done = True
+            self._newbar.set()
+
+    async def _produce(self):
+        raise NotImplementedError
+
+    async def waitbar(self):
+        '''Waits until a bar is pending or the producer is done'''
+        while not self._bars and not self._done:
+            self._newbar.clear()
+            await self._newbar.wait()
+
+    def _load(self):
+        if not self._bars:
+            return False
+
+        self.arrival, bar = self._bars.popleft()
+        return self._loadline(bar)
+
+
+class SocketData(AsyncData):
+    '''
+    Receives bars over a TCP connection, one bar per line in the format of
+    BacktraderCSVData (without headers). The end of the stream ends the data
+
+    Params:
+      - host, port: address to connect to
+      - separator: separator of the fields of a line
+    '''
+    params = (('host', 'localhost'), ('port', None), ('separator', ','),)
+
+    # Same line format as the csv files
+    _loadline = BacktraderCSVData._loadline
+
+    async def _produce(self):
+        reader, writer = await asyncio.open_connection(self.p.host,
+                                                       self.p.port)
+        separator = self.p.separator.encode('ascii')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                line = line.rstrip(b'\r\n')
+                if line:
+                    self._putbar(line.split(separator))
+        finally:
+            writer.close()
@@ -25,7 +25,11 @@ import datetime
 import itertools
 
 from .. import feed
+from ..linebuffer import LineBuffer
 from ..utils import date2num
+from ..utils.dateintern import (HOURS_PER_DAY, MINUTES_PER_DAY,
+                                SECONDS_PER_DAY)
+from ..utils.npsupport import np
 
 
 class BacktraderCSVData(feed.CSVDataBase):
@@ -64,6 +68,83 @@ class BacktraderCSVData(feed.CSVDataBase):
 
         return True
 
+    def _preloadbulk(self):
+        # All remaining lines of the file are parsed at once with numpy
+        if np is None or self.f is None or \
+           self.lines.datetime.mode != LineBuffer.UnBounded:
+            return False
+
+        try:
+            pos = self.f.tell()
+        except (IOError, ValueError):
+            return False  # not seekable: cannot go back if parsing fails
+
+        try:
+            columns = self._parsebulk()
+        except (ValueError, TypeError, IndexError):
+            # unexpected format: let the lines be parsed one by one
+            self.f.seek(pos)
+            return False
+
+        if columns is not None:
+            self._loadbulk(columns)
+
+        return True
+
+    def _parsebulk(self):
+        pos = self.f.tell()
+        firstline = self.f.readline()
+        self.f.seek(pos)
+        if not firstline.strip():
+            return None  # no bars
+
+        separator = self.p.separator
+        hastime = firstline.count(separator.encode('ascii')) == 7
+
+        fields = [(str('date'), str('S10'))]
+        if hastime:
+            fields.append((str('time'), str('S8')))
+
+        lnames = ['open', 'high', 'low', 'close', 'volume', 'openinterest']
+        fields.extend((str(lname), str('f8')) for lname in lnames)
+
+        bars = np.loadtxt(self.f, dtype=np.dtype(fields), delimiter=separator,
+                          comments=None, ndmin=1)
+
+        # Format is YYYY-MM-DD: ordinal of the day as in date.toordinal
+        days = bars['date'].astype('datetime64[D]')
+        ordinals = (days - np.datetime64('0001-01-01', 'D')).astype(np.int64)
+        dts = ordinals.astype(np.float64) + 1.0
+
+        if hastime:
+            # Format if present HH:MM:SS
+            times = np.ascontiguousarray(bars['time'])
+            digits = times.view(np.uint8).reshape(-1, 8) - ord('0')
+            digits = digits[:, [0, 1, 3, 4, 6, 7]].astype(np.int64)
+            if (digits > 9).any():
+                raise ValueError('Wrong time format')  # also below '0'
+
+            hh = digits[:, 0] * 10 + digits[:, 1]
+            mm = digits[:, 2] * 10 + digits[:, 3]
+            ss = digits[:, 4] * 10 + digits[:, 5]
+            if (hh > 23).any() or (mm > 59).any() or (ss > 59).any():
+                raise ValueError('Wrong time format')
+        else:
+            # put it at the end of the session parameter
+            hh = self.p.sessionend.hour
+            mm = self.p.sessionend.minute
+            ss = self.p.sessionend.second
+
+        # same operations (and rounding) as date2num
+        dts += (hh / HOURS_PER_DAY + mm / MINUTES_PER_DAY +
+                ss / SECONDS_PER_DAY)
+
+        columns = dict(datetime=dts)
+        for lname in lnames:
+            columns[lname] = bars[lname]
+
+        return columns
+
 
 class BacktraderCSV(feed.CSVFeedBase):
     DataCls = BacktraderCSVData
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import array
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+
+from .. import feed
+from ..linebuffer import LineBuffer
+
+
+# File layout:
+#   - MAGIC
+#   - length of the header (little endian uint32)
+#   - header: utf-8 json dict with the names of the lines and the number of
+#     bars (nbars)
+#   - padding up to the next multiple of ALIGN
+#   - one column of nbars little endian doubles per line, in header order
+#
+# The datetime column is always present and its values never go backwards
+MAGIC = b'BTCOLS01'
+ALIGN = 64
+_HEADLEN = struct.Struct(str('<I'))
+
+
+def writecolumns(filename, lines, columns):
+    '''
+    Writes the columns (sequences of floats of the same length, one per name
+    in lines) in the memory mappable format read by MMapData.
+
+    The file is replaced atomically to let running readers keep the mapping
+    of the previous version
+    '''
+    lines = list(lines)
+    columns = [array.array(str('d'), column) for column in columns]
+    if len(lines) != len(columns) or 'datetime' not in lines:
+        raise ValueError('a column per line (datetime included) is needed')
+
+    nbars = len(columns[0])
+    if any(len(column) != nbars for column in columns):
+        raise ValueError('all columns must have the same length')
+
+    dts = columns[lines.index('datetime')]
+    if any(dts[i] > dts[i + 1] for i in range(nbars - 1)):
+        raise ValueError('the datetime values cannot go backwards')
+
+    header = json.dumps(dict(lines=lines, nbars=nbars)).encode('utf-8')
+    start = len(MAGIC) + _HEADLEN.size + len(header)
+    padding = -start % ALIGN
+
+    tmpname = '%s.%d.tmp' % (filename, os.getpid())
+    with open(tmpname, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_HEADLEN.pack(len(header)))
+        f.write(header)
+        f.write(b'\0' * padding)
+        for column in columns:
+            if sys.byteorder != 'little':
+                column.byteswap()
+            column.tofile(f)
+
+    os.replace(tmpname, filename)
+
+
+class MMapData(feed.DataBase):
+    '''
+    Reads the binary columnar files written by writecolumns (see the
+    converter tools/csv2mmap.py) without parsing anything.
+
+    The file is memory mapped and, when preloading into unbounded buffers,
+    the lines are views on the mapping instead of copies: the processes which
+    read the same file share the pages of the system cache. Lines not present
+    in the file are filled with NaN
+
+    Params:
+      - dataname: name of the file
+    '''
+    _mmap = None
+
+    def start(self):
+        super(MMapData, self).start()
+        self._open()
+        self._pos = bisect.bisect_left(self._dts, self.fromdate)
+
+    def stop(self):
+        if self._mmap is not None:
+            self._columns = self._dts = None
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # preloaded lines still view it: closed when released
+
+            self._mmap = None
+
+    def _open(self):
+        with open(self.p.dataname, 'rb') as f:
+            # copy on write: a write to a line touches a private copy of the
+            # page and never the file
+            self._mmap = mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError('%s is not a columns file' % self.p.dataname)
+
+        start = len(MAGIC) + _HEADLEN.size
+        headlen, = _HEADLEN.unpack(mm[len(MAGIC):start])
+        header = json.loads(mm[start:start + headlen].decode('utf-8'))
+        start += headlen
+        start += -start % ALIGN
+
+        nbars = header['nbars']
+        view = memoryview(mm)
+        self._columns = columns = dict()
+        for i, line in enumerate(header['lines']):
+            begin = start + i * nbars * 8
+            column = view[begin:begin + nbars * 8].cast('d')
+            if sys.byteorder != 'little':
+                column = array.array(str('d'), column)
+                column.byteswap()
+
+            columns[line] = column
+
+        self._dts = dts = columns['datetime']
+        self._end = bisect.bisect_right(dts, self.todate)
+
+    def _preloadbulk(self):
+        if self.lines.datetime.mode != LineBuffer.UnBounded:
+            return False
+
+        pos, end = self._pos, self._end
+        nan = array.array(str('d'), [float('NaN')]) * (end - pos)
+        for i, line in enumerate(self.lines):
+            column = self._columns.get(self._getlinealias(i))
+            values = nan if column is None else column[pos:end]
+            if not line.buflen() and not isinstance(values, array.array):
+                line.forwardbuffer(values)  # zero copy
+            else:
+                line.forwardvalues(array.array(str('d'), values))
+
+        self._pos = end
+        return True
+
+    def preloadmore(self):
+        # bars may have been added by replacing the file
+        self._open()
+        for line in self.lines:
+            if not isinstance(line.array, array.array):
+                line.array = array.array(str('d'), line.array)
+
+        try:
+            return super(MMapData, self).preloadmore()
+        finally:
+            self.stop()
+
+    def savestate(self):
+        state = super(MMapData, self).savestate()
+        state['pos'] = self._pos
+        return state
+
+    def loadstate(self, state):
+        super(MMapData, self).loadstate(state)
+        self._pos = state['pos']
+
+    def _load(self):
+        if self._mmap is None or self._pos >= self._end:
+            return False
+
+        pos = self._pos
+        for i, line in enumerate(self.lines):
+            column = self._columns.get(self._getlinealias(i))
+            if column is not None:
+                line[0] = column[pos]
+
+        self._pos += 1
+        return True
@@ -41,16 +41,39 @@ class YahooFinanceCSVData(feed.CSVDataBase):
         if not self.params.reverse:
             return
 
+        self._reversefile()
+
+    def _reversefile(self, skip=0):
         # Yahoo sends data in reverse order and the file is still unreversed
         dq = collections.deque()
         for line in self.f:
             dq.appendleft(line)
 
-        f = six.StringIO()
+        isbytes = bool(dq) and isinstance(dq[0], bytes)
+        newline = b'\n' if isbytes else '\n'
+        if dq and not dq[0].endswith(newline):
+            dq[0] += newline  # the last line of the file may have none
+
+        self._nlines = len(dq)  # new bars are later added at the top
+        for i in range(min(skip, len(dq))):
+            dq.popleft()
+
+        f = six.BytesIO() if isbytes else six.StringIO()
         f.writelines(dq)
+        f.seek(0)
         self.f.close()
         self.f = f
 
+    def preloadmore(self):
+        if self.params.reverse and self.f is None and \
+           not hasattr(self.p.dataname, 'readline'):
+            # the file offset is meaningless: read it again and skip the
+            # lines which were already loaded
+            super(YahooFinanceCSVData, self).start()
+            self._reversefile(skip=self._nlines)
+
+        return super(YahooFinanceCSVData, self).preloadmore()
+
     def _loadline(self, linetokens):
         i = itertools.count(0)
 
@@ -26,17 +26,33 @@ import math
 
 from six.moves import xrange
 
-from .linebuffer import LineActions
+from .linebuffer import LineActions, PseudoArray
 from .utils import cmp
+from .utils.npsupport import np, npview
 
 
 class Logic(LineActions):
+    # subclasses which implement _once_np set it to True
+    _npvector = False
+
     def __init__(self, *args):
         super(Logic, self).__init__()
         self.args = [self.arrayize(arg) for arg in args]
 
+        if self._vectorize and self._npvector:
+            self.once = self._once_np
+
+    @staticmethod
+    def npslice(arg, start, end):
+        if isinstance(arg, PseudoArray):
+            return arg.wrapped
+
+        return npview(arg.array)[start:end]
+
 
 class Cmp(Logic):
+    _npvector = True
+
     def __init__(self, a, b):
         super(Cmp, self).__init__(a, b)
         self.a = self.args[0]
@@ -54,8 +70,17 @@ class Cmp(Logic):
         for i in xrange(start, end):
             dst[i] = cmp(srca[i], srcb[i])
 
+    def _once_np(self, start, end):
+        dst = npview(self.array)
+        a = self.npslice(self.a, start, end)
+        b = self.npslice(self.b, start, end)
+
+        dst[start:end] = np.greater(a, b).astype(np.float64) - np.less(a, b)
+
 
 class If(Logic):
+    _npvector = True
+
     def __init__(self, cond, a, b):
         super(If, self).__init__(a, b)
         self.a = self.args[0]
@@ -75,8 +100,19 @@ class If(Logic):
         for i in xrange(start, end):
             dst[i] = srca[i] if cond[i] else srcb[i]
 
+    def _once_np(self, start, end):
+        dst = npview(self.array)
+        a = self.npslice(self.a, start, end)
+        b = self.npslice(self.b, start, end)
+        cond = self.npslice(self.cond, start, end)
+
+        dst[start:end] = np.where(cond, a, b)  # NaN is also True
+
 
 class MultiLogic(Logic):
+    # numpy counterpart of flogic, reducing the args 2 by 2
+    npflogic = None
+
     def next(self):
         self[0] = self.flogic([arg[0] for arg in self.args])
 
@@ -89,6 +125,12 @@ class MultiLogic(Logic):
         for i in xrange(start, end):
             dst[i] = flogic([arr[i] for arr in arrays])
 
+    def _once_np(self, start, end):
+        dst = npview(self.array)
+        arrays = [self.npslice(arg, start, end) for arg in self.args]
+
+        dst[start:end] = functools.reduce(self.npflogic, arrays)
+
 
 class MultiLogicReduce(MultiLogic):
     def __init__(self, *args):
@@ -97,20 +139,31 @@ class MultiLogicReduce(MultiLogic):
 
 
 class And(MultiLogicReduce):
+    _npvector = True
     flogic = staticmethod(lambda x, y: x and y)
+    npflogic = staticmethod(lambda x, y: np.where(x != 0.0, y, x))
 
 
 class Or(MultiLogicReduce):
+    _npvector = True
     flogic = staticmethod(lambda x, y: x or y)
+    npflogic = staticmethod(lambda x, y: np.where(x != 0.0, x, y))
 
 
 class Max(MultiLogic):
+    # Like max: the 1st value is kept unless a later one is greater
+    _npvector = True
     flogic = max
+    npflogic = staticmethod(lambda x, y: np.where(y > x, y, x))
 
 
 class Min(MultiLogic):
+    _npvector = True
     flogic = min
+    npflogic = staticmethod(lambda x, y: np.where(y < x, y, x))
 
 
 class Sum(MultiLogic):
+    _npvector = True
     flogic = math.fsum
+    npflogic = staticmethod(lambda x, y: np.add(x, y))
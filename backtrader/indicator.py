@@ -22,13 +22,73 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 
+try:
+    from collections import OrderedDict
+except ImportError:
+    from .utils.ordereddict import OrderedDict
+
 import six
 from six.moves import xrange
 
+from .linebuffer import cachekey
 from .lineiterator import LineIterator, IndicatorBase
 from .lineseries import LineSeriesMaker
 
 
+class IndicatorCache(object):
+    '''
+    Keeps the line arrays calculated by indicators in runonce mode to let
+    indicators with the same key (class, params and input lines) reuse them in
+    later runs (for example across the combinations of an optimization)
+
+    Least recently used entries are dropped to keep the memory taken by the
+    cached arrays below maxsize (in bytes)
+    '''
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _arrayssize(arrays):
+        return sum(len(a) * a.itemsize for a in arrays)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def get(self, key):
+        try:
+            arrays = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self._entries[key] = arrays  # re-insert as most recently used
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        size = self._arrayssize(arrays)
+        if size > self.maxsize:
+            return  # would evict everything else and still not fit
+
+        if key in self._entries:
+            self.size -= self._arrayssize(self._entries.pop(key))
+
+        self._entries[key] = arrays
+        self.size += size
+
+        while self.size > self.maxsize:
+            _, oldarrays = self._entries.popitem(last=False)
+            self.size -= self._arrayssize(oldarrays)
+
+
 class MetaIndicator(IndicatorBase.__class__):
     _indcol = dict()
 
@@ -82,10 +142,62 @@ class MetaIndicator(IndicatorBase.__class__):
         # return the values
         return _obj, args, kwargs
 
+    def dopreinit(cls, _obj, *args, **kwargs):
+        _obj, args, kwargs = \
+            super(MetaIndicator, cls).dopreinit(_obj, *args, **kwargs)
+
+        # Inherit the cross-run cache from the owner (strategy or indicator)
+        _obj._indcache = getattr(_obj._owner, '_indcache', None)
+
+        return _obj, args, kwargs
+
+    def dopostinit(cls, _obj, *args, **kwargs):
+        _obj, args, kwargs = \
+            super(MetaIndicator, cls).dopostinit(_obj, *args, **kwargs)
+
+        # The values of the indicator are defined by the class, the params,
+        # the input lines and any other argument received by __init__
+        kwitems = list()
+        for kwitem in sorted(kwargs.items()):
+            kwitems.extend(kwitem)
+
+        key = cachekey(cls, len(_obj.datas), *(
+            _obj.datas + _obj.params._getvalues() + list(args) + kwitems))
+
+        _obj._cachekey = key
+        for i, line in enumerate(_obj.lines):
+            line._cachekey = key and (key, i)
+
+        return _obj, args, kwargs
+
 
 class Indicator(six.with_metaclass(MetaIndicator, IndicatorBase)):
     _autoinit = True
     _ltype = LineIterator.IndType
+    _indcache = None
+
+    def _once(self):
+        if self._indcache is None or self._cachekey is None or \
+           not self.lines.fullsize():
+            super(Indicator, self)._once()
+            return
+
+        arrays = self._indcache.get(self._cachekey)
+        if arrays is None or len(arrays[0]) != self._clock.buflen():
+            super(Indicator, self)._once()
+            self._indcache.put(self._cachekey,
+                               [line.array for line in self.lines])
+            return
+
+        # Values calculated in a previous run: sub-indicators are skipped
+        self.forward(size=self._clock.buflen())
+        for line, carray in zip(self.lines, arrays):
+            line.array[:] = carray
+
+        self.home()
+
+        for line in self.lines:
+            line.oncebinding()
 
     def advance(self):
         # Need intercepting this call to support datas with
@@ -21,12 +21,207 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import collections
 import math
 import operator
 
 from six.moves import xrange
 
 from . import Indicator
+from ..utils.npsupport import np, npview, npwindows
+
+
+def _addcomp(s, c, x):
+    '''Adds x to the sum s with the Neumaier compensation c'''
+    t = s + x
+    if abs(s) >= abs(x):
+        c += (s - t) + x
+    else:
+        c += (x - t) + s
+
+    return t, c
+
+
+def _rollingsum(src, dst, start, end, period, divisor=1.0):
+    '''
+    Sets dst[i] to the sum of src[i - period + 1:i + 1] divided by divisor
+    for i in [start, end)
+
+    The sum is kept by adding the entering value and subtracting the leaving
+    one with Neumaier compensation and is recalculated with fsum every period
+    values (and after a NaN) to keep the error from accumulating
+    '''
+    fsum = math.fsum
+    anchor = start - period
+
+    for i in xrange(start, end):
+        if i - anchor < period:
+            for x in (src[i], -src[i - period]):  # _addcomp inlined
+                t = s + x
+                if abs(s) >= abs(x):
+                    c += (s - t) + x
+                else:
+                    c += (x - t) + s
+                s = t
+
+            total = s + c
+
+        if i - anchor >= period or total != total:
+            s = total = fsum(src[i - period + 1:i + 1])
+            c = 0.0
+            anchor = i
+
+        dst[i] = total / divisor
+
+
+class _Rolling(object):
+    '''
+    Base of the running calculations which next keeps over the last values
+    of a data. push adds the value of a new bar and returns the result,
+    which is only complete once lookback values have been pushed
+    '''
+    def __init__(self, period, lookback=None):
+        self.period = period
+        self.lookback = lookback or period
+        self.pos = -1
+        self.clear()
+
+    def clear(self):
+        raise NotImplementedError
+
+    def push(self, value):
+        raise NotImplementedError
+
+    def __call__(self, pos, data):
+        '''Returns the result at pos, the length of the calculating object'''
+        if pos == self.pos + 1:
+            result = self.push(data[0])
+        else:
+            # not the bar after the last one (ex: a replayed bar)
+            self.clear()
+            for value in data.get(size=self.lookback):
+                result = self.push(value)
+
+        self.pos = pos
+        return result
+
+
+class _RollingSum(_Rolling):
+    '''
+    Sum of the last period values, kept as _rollingsum does for once
+    '''
+    def clear(self):
+        self.window = collections.deque(maxlen=self.period)
+        self.s = self.c = 0.0
+        self.count = 0
+
+    def push(self, value):
+        window = self.window
+        s, c = _addcomp(self.s, self.c, value)
+        if len(window) == self.period:
+            s, c = _addcomp(s, c, -window[0])
+
+        window.append(value)
+        total = s + c
+        self.count += 1
+        if self.count >= self.period or total != total:
+            # recalculated to keep the error from accumulating
+            s = total = math.fsum(window)
+            c = 0.0
+            self.count = 0
+
+        self.s, self.c = s, c
+        return total
+
+
+def _linearweights(weights, period):
+    '''
+    Returns (a, b) if the weights are linear (weights[k - 1] == a + b * k for
+    k in 1 ... period) and else None
+    '''
+    if len(weights) != period:
+        return None
+
+    b = weights[1] - weights[0] if period > 1 else 0.0
+    a = weights[0] - b
+    if any(w != a + b * k for k, w in enumerate(weights, 1)):
+        return None
+
+    return a, b
+
+
+def _rollingweighted(src, dst, start, end, period, a, b, coef):
+    '''
+    Sets dst[i] to coef times the sum of src[i - period + 1:i + 1] weighted
+    by the linear weights a + b * k (k in 1 ... period) for i in [start, end)
+
+    The weighted sum is a * s + b * w, with s the sum of the values and w the
+    sum weighted by k. For each bar w gains period times the entering value
+    and loses the previous s, and s is updated as in _rollingsum
+    '''
+    fsum = math.fsum
+    ks = [float(k) for k in range(1, period + 1)]
+    anchor = start - period
+
+    for i in xrange(start, end):
+        if i - anchor < period:
+            x = src[i]
+            w, cw = _addcomp(w, cw, period * x)
+            w, cw = _addcomp(w, cw, -(s + cs))
+            s, cs = _addcomp(s, cs, x)
+            s, cs = _addcomp(s, cs, -src[i - period])
+            total = a * (s + cs) + b * (w + cw)
+
+        if i - anchor >= period or total != total:
+            window = src[i - period + 1:i + 1]
+            s = fsum(window)
+            w = fsum(map(operator.mul, window, ks))
+            cs = cw = 0.0
+            total = a * s + b * w
+            anchor = i
+
+        dst[i] = coef * total
+
+
+class _RollingWeightedSum(_Rolling):
+    '''
+    Sum of the last period values weighted by a + b * k, kept as
+    _rollingweighted does for once
+    '''
+    def __init__(self, period, a, b):
+        self.a, self.b = a, b
+        self.ks = [float(k) for k in range(1, period + 1)]
+        super(_RollingWeightedSum, self).__init__(period)
+
+    def clear(self):
+        self.window = collections.deque(maxlen=self.period)
+        self.sums = None
+        self.count = 0
+
+    def push(self, value):
+        window = self.window
+        total = None
+        if len(window) == self.period:
+            s, cs, w, cw = self.sums
+            w, cw = _addcomp(w, cw, self.period * value)
+            w, cw = _addcomp(w, cw, -(s + cs))
+            s, cs = _addcomp(s, cs, value)
+            s, cs = _addcomp(s, cs, -window[0])
+            self.sums = s, cs, w, cw
+            self.count += 1
+            total = self.a * (s + cs) + self.b * (w + cw)
+
+        window.append(value)
+        if len(window) == self.period and \
+           (total is None or total != total or self.count >= self.period):
+            # recalculated to keep the error from accumulating
+            s = math.fsum(window)
+            w = math.fsum(map(operator.mul, window, self.ks))
+            self.sums = s, 0.0, w, 0.0
+            self.count = 0
+            total = self.a * s + self.b * w
+
+        return total
 
 
 class PeriodN(Indicator):
@@ -53,13 +248,81 @@ class OperationN(PeriodN):
     Note:
       Base classes must provide a "func" attribute which is a callable
 
+      They may also provide in "npfunc" the name of the numpy reduction
+      (for example "max") equivalent to func, used in vectorized mode
+
+      If func picks the highest/lowest value of the period (or its index)
+      "_dqdrop" can be set to the comparison (previous, new) which tells
+      that a previous value can no longer be picked once new has entered
+      the period. A monotonic deque of the candidates then replaces the
+      evaluation of func over the whole period for each bar. "_dqindex"
+      returns the index (ago) of the candidate instead of its value. NaN
+      values are not candidates: while one is in the period func is
+      evaluated, because its result then depends on where the NaN is
+
     Formula:
       - line = func(data, period)
     '''
+    npfunc = None
+    _dqdrop = None
+    _dqindex = False
+
+    def __init__(self):
+        super(OperationN, self).__init__()
+        self._dq = collections.deque()  # (position, value) candidates
+        self._dqpos = -1
+        self._dqnan = None  # position of the last NaN
+
+    def loadstate(self, state):
+        super(OperationN, self).loadstate(state)
+        self._dqpos = -1  # the deque is rebuilt from the lines
+
     def next(self):
+        if self._dqdrop is not None:
+            return self._next_dq()
+
         self.line[0] = self.func(self.data.get(size=self.p.period))
 
+    def _next_dq(self):
+        period = self.p.period
+        drop = self._dqdrop
+        dq = self._dq
+        pos = len(self)
+
+        if pos == self._dqpos + 1:
+            values = [(pos, self.data[0])]
+        else:
+            # not the bar after the last one (ex: a replayed bar)
+            dq.clear()
+            self._dqnan = None
+            values = zip(xrange(pos - period + 1, pos + 1),
+                         self.data.get(size=period))
+
+        for entry in values:
+            if entry[1] != entry[1]:
+                self._dqnan = entry[0]
+                continue
+
+            while dq and drop(dq[-1][1], entry[1]):
+                dq.pop()
+            dq.append(entry)
+
+        if dq and dq[0][0] <= pos - period:
+            dq.popleft()
+
+        self._dqpos = pos
+        if self._dqnan is not None and self._dqnan > pos - period:
+            self.line[0] = self.func(self.data.get(size=period))
+        else:
+            self.line[0] = pos - dq[0][0] if self._dqindex else dq[0][1]
+
     def once(self, start, end):
+        if self._vectorize and self.npfunc:
+            return self._once_np(start, end)
+
+        if self._dqdrop is not None:
+            return self._once_dq(start, end)
+
         dst = self.line.array
         src = self.data.array
         period = self.p.period
@@ -68,6 +331,42 @@ class OperationN(PeriodN):
         for i in xrange(start, end):
             dst[i] = func(src[i - period + 1: i + 1])
 
+    def _once_dq(self, start, end):
+        dst = self.line.array
+        src = self.data.array
+        period = self.p.period
+        drop = self._dqdrop
+        index = self._dqindex
+        func = self.func
+        dq = collections.deque()  # indices of the candidates
+        nan = start - period  # index of the last NaN
+
+        for i in xrange(start - period + 1, end):
+            value = src[i]
+            if value != value:
+                nan = i
+            else:
+                while dq and drop(src[dq[-1]], value):
+                    dq.pop()
+                dq.append(i)
+
+            if dq and dq[0] <= i - period:
+                dq.popleft()
+
+            if i >= start:
+                if nan > i - period:
+                    dst[i] = func(src[i - period + 1: i + 1])
+                else:
+                    dst[i] = i - dq[0] if index else src[dq[0]]
+
+    def _once_np(self, start, end):
+        period = self.p.period
+        dst = npview(self.line.array)
+        windows = npwindows(npview(self.data.array), period)
+        windows = windows[start - period + 1:end - period + 1]
+
+        dst[start:end] = getattr(windows, self.npfunc)(axis=1)
+
 
 class Highest(OperationN):
     '''
@@ -78,6 +377,8 @@ class Highest(OperationN):
     '''
     lines = ('highest',)
     func = max
+    npfunc = 'max'
+    _dqdrop = operator.le
 
 
 class Lowest(OperationN):
@@ -89,6 +390,8 @@ class Lowest(OperationN):
     '''
     lines = ('lowest',)
     func = min
+    npfunc = 'min'
+    _dqdrop = operator.ge
 
 
 class SumN(OperationN):
@@ -100,6 +403,25 @@ class SumN(OperationN):
     '''
     lines = ('sumn',)
     func = math.fsum
+    npfunc = 'sum'
+
+    def __init__(self):
+        super(SumN, self).__init__()
+        self._rsum = _RollingSum(self.p.period)
+
+    def loadstate(self, state):
+        super(SumN, self).loadstate(state)
+        self._rsum.pos = -1
+
+    def next(self):
+        self.line[0] = self._rsum(len(self), self.data)
+
+    def once(self, start, end):
+        if self._vectorize:
+            return self._once_np(start, end)
+
+        _rollingsum(self.data.array, self.line.array, start, end,
+                    self.p.period)
 
 
 class FindFirstIndex(OperationN):
@@ -117,6 +439,14 @@ class FindFirstIndex(OperationN):
     lines = ('index',)
     params = (('_evalfunc', None),)
 
+    # the most recent of equal candidates is kept
+    _dqdrops = {max: operator.le, min: operator.ge}
+    _dqindex = True
+
+    def __init__(self):
+        super(FindFirstIndex, self).__init__()
+        self._dqdrop = self._dqdrops.get(self.p._evalfunc)
+
     def func(self, iterable):
         m = self.p._evalfunc(iterable)
         return next(i for i, v in enumerate(reversed(iterable)) if v == m)
@@ -165,6 +495,14 @@ class FindLastIndex(OperationN):
     lines = ('index',)
     params = (('_evalfunc', None),)
 
+    # the oldest of equal candidates is kept
+    _dqdrops = {max: operator.lt, min: operator.gt}
+    _dqindex = True
+
+    def __init__(self):
+        super(FindLastIndex, self).__init__()
+        self._dqdrop = self._dqdrops.get(self.p._evalfunc)
+
     def func(self, iterable):
         m = self.p._evalfunc(iterable)
         index = next(i for i, v in enumerate(iterable) if v == m)
@@ -253,17 +591,31 @@ class Average(PeriodN):
     alias = ('ArithmeticMean', 'Mean',)
     lines = ('av',)
 
+    def __init__(self):
+        super(Average, self).__init__()
+        self._rsum = _RollingSum(self.p.period)
+
+    def loadstate(self, state):
+        super(Average, self).loadstate(state)
+        self._rsum.pos = -1
+
     def next(self):
-        self.line[0] = \
-            math.fsum(self.data.get(size=self.p.period)) / self.p.period
+        self.line[0] = self._rsum(len(self), self.data) / self.p.period
 
     def once(self, start, end):
-        src = self.data.array
-        dst = self.line.array
+        if self._vectorize:
+            return self._once_np(start, end)
+
+        _rollingsum(self.data.array, self.line.array, start, end,
+                    self.p.period, self.p.period)
+
+    def _once_np(self, start, end):
         period = self.p.period
+        dst = npview(self.line.array)
+        windows = npwindows(npview(self.data.array), period)
 
-        for i in xrange(start, end):
-            dst[i] = math.fsum(src[i - period + 1:i + 1]) / period
+        dst[start:end] = \
+            windows[start - period + 1:end - period + 1].sum(axis=1) / period
 
 
 class ExponentialSmoothing(Average):
@@ -360,7 +712,9 @@ class WeightedAverage(PeriodN):
     The default weights (if none are provided) are linear to assigne more
     weight to the most recent data
 
-    The result will be multiplied by a given "coef"
+    The result will be multiplied by a given "coef". If none is given, the
+    default weights are normalized with 2 / (period * (period + 1)) and the
+    provided weights are used as given (coef 1.0)
 
     Formula:
       - av = coef * sum(mul(data, period), weights)
@@ -370,25 +724,67 @@ class WeightedAverage(PeriodN):
     '''
     alias = ('AverageWeighted',)
     lines = ('av',)
-    params = (('coef', 1.0), ('weights', []),)
+    params = (('coef', None), ('weights', []),)
 
     def __init__(self):
         super(WeightedAverage, self).__init__()
-        self.coef = 2.0 / (self.p.period * (self.p.period + 1.0))
-        self.weights = [float(x) for x in range(1, self.p.period + 1)]
+        period = self.p.period
+        if self.p.weights:
+            self.weights = [float(x) for x in self.p.weights]
+            self.coef = 1.0
+        else:
+            self.weights = [float(x) for x in range(1, period + 1)]
+            self.coef = 2.0 / (period * (period + 1.0))
+
+        if self.p.coef is not None:
+            self.coef = self.p.coef
+
+        # linear weights (the usual case) keep running sums
+        self._linear = _linearweights(self.weights, period)
+        if self._linear is not None:
+            self._rsum = _RollingWeightedSum(period, *self._linear)
+
+    def loadstate(self, state):
+        super(WeightedAverage, self).loadstate(state)
+        if self._linear is not None:
+            self._rsum.pos = -1
 
     def next(self):
+        if self._linear is not None:
+            self.line[0] = self.coef * self._rsum(len(self), self.data)
+            return
+
         data = self.data.get(size=self.p.period)
-        dataweighted = map(operator.mul, data, self.p.weights)
-        self.line[0] = self.p.coef * math.fsum(dataweighted)
+        dataweighted = map(operator.mul, data, self.weights)
+        self.line[0] = self.coef * math.fsum(dataweighted)
 
     def once(self, start, end):
+        # the running sums of linear weights are only beaten by numpy if
+        # vectorized. Other weights are a dot product of each window
+        usenp = np is not None and len(self.weights) == self.p.period
+        if usenp and (self._vectorize or self._linear is None):
+            return self._once_np(start, end)
+
         darray = self.data.array
         larray = self.line.array
         period = self.p.period
-        coef = self.p.coef
-        weights = self.p.weights
+        coef = self.coef
+
+        if self._linear is not None:
+            a, b = self._linear
+            _rollingweighted(darray, larray, start, end, period, a, b, coef)
+            return
 
+        weights = self.weights
         for i in xrange(start, end):
             data = darray[i - period + 1: i + 1]
             larray[i] = coef * math.fsum(map(operator.mul, data, weights))
+
+    def _once_np(self, start, end):
+        period = self.p.period
+        dst = npview(self.line.array)
+        windows = npwindows(npview(self.data.array), period)
+        windows = windows[start - period + 1:end - period + 1]
+        weights = np.asarray(self.weights, dtype=np.float64)
+
+        dst[start:end] = self.coef * windows.dot(weights)
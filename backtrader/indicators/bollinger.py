@@ -21,7 +21,12 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import math
+
+from six.moves import xrange
+
 from . import Indicator, MovAv, StdDev
+from .deviation import _RollingMoments
 
 
 class BollingerBands(Indicator):
@@ -55,9 +60,49 @@ class BollingerBands(Indicator):
         return plabels
 
     def __init__(self):
-        self.lines.mid = ma = self.p.movav(self.data, period=self.p.period)
-        stddev = self.p.devfactor * StdDev(self.data, ma, period=self.p.period)
-        self.lines.top = ma + stddev
-        self.lines.bot = ma - stddev
+        # with a simple mean the 3 lines are calculated in a single pass
+        self._fused = self.p.movav is MovAv.Simple
+        if self._fused:
+            self.addminperiod(self.p.period)
+            self._moments = _RollingMoments(self.p.period)
+        else:
+            self.lines.mid = ma = self.p.movav(self.data, period=self.p.period)
+            stddev = self.p.devfactor * \
+                StdDev(self.data, ma, period=self.p.period)
+            self.lines.top = ma + stddev
+            self.lines.bot = ma - stddev
 
         super(BollingerBands, self).__init__()
+
+    def next(self):
+        if self._fused:
+            mean, variance = self._moments(len(self), self.data)
+            stddev = self.p.devfactor * math.sqrt(variance)
+            self.lines.mid[0] = mean
+            self.lines.top[0] = mean + stddev
+            self.lines.bot[0] = mean - stddev
+
+    def once(self, start, end):
+        if not self._fused:
+            return
+
+        src = self.data.array
+        mid = self.lines.mid.array
+        top = self.lines.top.array
+        bot = self.lines.bot.array
+        devfactor = self.p.devfactor
+        moments = _RollingMoments(self.p.period)
+
+        for i in xrange(start - self.p.period + 1, end):
+            result = moments.push(src[i])
+            if i >= start:
+                mean, variance = result
+                stddev = devfactor * math.sqrt(variance)
+                mid[i] = mean
+                top[i] = mean + stddev
+                bot[i] = mean - stddev
+
+    def loadstate(self, state):
+        super(BollingerBands, self).loadstate(state)
+        if self._fused:
+            self._moments.pos = -1
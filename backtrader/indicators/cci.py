@@ -63,7 +63,11 @@ class CommodityChannelIndex(Indicator):
         tpmean = self.p.movav(tp, period=self.p.period)
 
         dev = tp - tpmean
-        meandev = MeanDev(tp, tpmean, period=self.p.period)
+        if self.p.movav is MovAv.Simple:
+            # calculates the same mean in its single pass
+            meandev = MeanDev(tp, period=self.p.period)
+        else:
+            meandev = MeanDev(tp, tpmean, period=self.p.period)
 
         self.lines.cci = dev / (self.p.factor * meandev)
 
@@ -21,7 +21,101 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import collections
+import math
+
+from six.moves import xrange
+
 from . import Indicator, MovAv
+from .basicops import _addcomp, _Rolling, _RollingSum
+
+
+def _meanpassed(indicator):
+    '''
+    Tells if a mean has been passed as 2nd data. The datas added by the
+    indicator when a single data is passed (its other lines, or the line
+    itself repeated if it has only one) are not a mean
+    '''
+    datas = indicator.datas
+    data = datas[0]
+    if data.size():
+        autolines = [data.lines[i] for i in range(1, data.size())]
+    else:
+        autolines = [data.lines[i] for i in range(data.lines.extrasize())]
+
+    lines = [d.lines[0] for d in datas[1:]]
+    if len(lines) != len(autolines):
+        return bool(lines)
+
+    return not all(x is y for x, y in zip(lines, autolines))
+
+
+class _RollingMoments(_Rolling):
+    '''
+    Mean and (population) variance of the last period values, pushed one by
+    one. The sum is kept as by _RollingSum and the sum of the squared
+    deviations from the mean is updated (Welford with the removal of the
+    leaving value) instead of subtracting the squared mean from the mean of
+    the squares, which loses the precision with large values. Both are
+    recalculated from the values every period pushes
+    '''
+    def clear(self):
+        self.window = collections.deque(maxlen=self.period)
+        self.s = self.c = self.m2 = 0.0
+        self.count = 0
+
+    def push(self, value):
+        window = self.window
+        period = self.period
+        result = None
+        if len(window) == period:
+            leaving = window[0]
+            mean0 = (self.s + self.c) / period
+            s, c = _addcomp(self.s, self.c, value)
+            s, c = _addcomp(s, c, -leaving)
+            mean = (s + c) / period
+            m2 = self.m2 + (value - leaving) * (value - mean + leaving - mean0)
+            self.s, self.c, self.m2 = s, c, m2
+            self.count += 1
+            result = mean, max(0.0, m2 / period)
+
+        window.append(value)
+        if len(window) == period and \
+           (result is None or self.count >= period or m2 != m2):
+            s = math.fsum(window)
+            mean = s / period
+            m2 = math.fsum([(x - mean) * (x - mean) for x in window])
+            self.s, self.c, self.m2 = s, 0.0, m2
+            self.count = 0
+            result = mean, m2 / period
+
+        return result
+
+
+class _RollingMeanDev(_Rolling):
+    '''
+    Mean over period of the absolute deviations of the values from the mean
+    of their own period, pushed one by one. It needs 2 * period - 1 values
+    '''
+    def __init__(self, period):
+        super(_RollingMeanDev, self).__init__(period, 2 * period - 1)
+
+    def clear(self):
+        self.sums = _RollingSum(self.period)
+        self.devsums = _RollingSum(self.period)
+        self.count = 0
+
+    def push(self, value):
+        self.count += 1
+        mean = self.sums.push(value) / self.period
+        if self.count < self.period:
+            return None
+
+        devsum = self.devsums.push(abs(value - mean))
+        if self.count < self.lookback:
+            return None
+
+        return devsum / self.period
 
 
 class StandardDeviation(Indicator):
@@ -51,7 +145,15 @@ class StandardDeviation(Indicator):
         return plabels
 
     def __init__(self):
-        if len(self.datas) > 1:
+        # a simple mean of its own is calculated in a single pass
+        self._fused = \
+            not _meanpassed(self) and self.p.movav is MovAv.Simple
+        if self._fused:
+            self.addminperiod(self.p.period)
+            self._moments = _RollingMoments(self.p.period)
+            return
+
+        if _meanpassed(self):
             mean = self.data1
         else:
             mean = self.p.movav(self.data, period=self.p.period)
@@ -60,6 +162,29 @@ class StandardDeviation(Indicator):
         sqmean = pow(mean, 2)
         self.lines.stddev = pow(meansq - sqmean, 0.5)
 
+    def next(self):
+        if self._fused:
+            _, variance = self._moments(len(self), self.data)
+            self.lines.stddev[0] = math.sqrt(variance)
+
+    def once(self, start, end):
+        if not self._fused:
+            return
+
+        src = self.data.array
+        dst = self.lines.stddev.array
+        moments = _RollingMoments(self.p.period)
+
+        for i in xrange(start - self.p.period + 1, end):
+            result = moments.push(src[i])
+            if i >= start:
+                dst[i] = math.sqrt(result[1])
+
+    def loadstate(self, state):
+        super(StandardDeviation, self).loadstate(state)
+        if self._fused:
+            self._moments.pos = -1
+
 
 class MeanDeviation(Indicator):
     '''MeanDeviation (alias MeanDev)
@@ -89,10 +214,40 @@ class MeanDeviation(Indicator):
         return plabels
 
     def __init__(self):
-        if len(self.datas) > 1:
+        # a simple mean of its own is calculated in a single pass
+        self._fused = \
+            not _meanpassed(self) and self.p.movav is MovAv.Simple
+        if self._fused:
+            self.addminperiod(2 * self.p.period - 1)
+            self._meandev = _RollingMeanDev(self.p.period)
+            return
+
+        if _meanpassed(self):
             mean = self.data1
         else:
             mean = self.p.movav(self.data, period=self.p.period)
 
         absdev = abs(self.data - mean)
         self.lines.meandev = self.p.movav(absdev, period=self.p.period)
+
+    def next(self):
+        if self._fused:
+            self.lines.meandev[0] = self._meandev(len(self), self.data)
+
+    def once(self, start, end):
+        if not self._fused:
+            return
+
+        src = self.data.array
+        dst = self.lines.meandev.array
+        meandev = _RollingMeanDev(self.p.period)
+
+        for i in xrange(start - meandev.lookback + 1, end):
+            result = meandev.push(src[i])
+            if i >= start:
+                dst[i] = result
+
+    def loadstate(self, state):
+        super(MeanDeviation, self).loadstate(state)
+        if self._fused:
+            self._meandev.pos = -1
@@ -32,18 +32,70 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import array
+import collections
+import itertools
 
 import six
 from six.moves import xrange
 
 from .lineroot import LineRoot, LineSingle
 from . import metabase
-from .utils import num2date
+from .utils import num2date, num2ordtime
+from .utils.npsupport import np, npview, NPOPS
 
 
 NAN = float('NaN')
 
 
+def cachekey(*args):
+    '''
+    Returns a hashable key built out of args or None if any of them cannot be
+    part of a key. Lines (and objects holding lines) are represented by their
+    own _cachekey, which identifies the values they will hold
+    '''
+    key = list()
+    for arg in args:
+        if isinstance(arg, LineRoot):
+            arg = arg._cachekey
+            if arg is None:
+                return None
+        elif isinstance(arg, list):
+            arg = tuple(arg)
+
+        try:
+            hash(arg)
+        except TypeError:
+            return None
+
+        key.append(arg)
+
+    return tuple(key)
+
+
+class QBufferArray(collections.deque):
+    '''
+    Circular buffer of the QBuffer mode of LineBuffer. Like an array.array of
+    doubles it stores the values as floats and unlike a deque it does not
+    wrap around negative indices: those point to values which have already
+    been dropped on the left hand side
+    '''
+    __slots__ = ()
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            raise IndexError(
+                'value dropped from the buffer (savemem): call minbuffer on '
+                'the line with the largest "ago" to be looked at')
+
+        return collections.deque.__getitem__(self, idx)
+
+    def __setitem__(self, idx, value):
+        collections.deque.__setitem__(self, idx, float(value))
+
+    def append(self, value):
+        collections.deque.append(self, float(value))
+
+
 class LineBuffer(LineSingle):
     '''
     LineBuffer defines an interface to an "array.array" (or list) in which
@@ -65,8 +117,20 @@ class LineBuffer(LineSingle):
     The class can also hold "bindings" to other LineBuffers. When a value
     is set in this class
     it will also be set in the binding.
+
+    In QBuffer mode (see qbuffer) the buffer is a fixed size circular buffer
+    which only keeps the values consumers may still look back at, with the
+    same "ago" semantics as the unbounded buffer
     '''
 
+    UnBounded, QBuffer = range(2)
+
+    mode = UnBounded
+    maxlen = 0
+    extrasize = 0
+
+    _DTMEMO = 64  # max number of decoded datetimes kept by datetime
+
     def __init__(self, typecode='d'):
         '''
         Keyword Args:
@@ -83,13 +147,65 @@ class LineBuffer(LineSingle):
         '''
         self.create_array()
         self.idx = -1
+        self.lencount = 0
         self.extension = 0
+        self._dtmemo = dict()
 
     def create_array(self):
-        self.array = array.array(str(self.typecode))
+        if self.mode == self.QBuffer:
+            self.array = QBufferArray(maxlen=self.maxlen + self.extrasize)
+        else:
+            self.array = array.array(str(self.typecode))
+
+    def qbuffer(self, extrasize=1):
+        '''
+        Turns the buffer into a circular buffer which keeps only the last
+        values. The size is the minimum period of the line (enlarged by
+        consumers with minbuffer) plus extrasize positions, which by default
+        leaves room to look at the value before the minimum period ([-1])
+
+        Only suitable for next (non-preloaded) operation, because the values
+        dropped on the left hand side are gone
+        '''
+        self.mode = self.QBuffer
+        self.maxlen = max(self.maxlen, self._minperiod)
+        self.extrasize = extrasize
+        self._resizeqbuffer()
+
+    def minbuffer(self, size):
+        '''
+        Ensures that at least size values are kept if the buffer is (or is
+        later put) in QBuffer mode. Consumers use it to make room for their
+        own lookback and strategies for the largest "ago" they look at
+        (size=ago+1), which is not known from the minimum periods
+        '''
+        if size > self.maxlen:
+            self.maxlen = size
+            if self.mode == self.QBuffer:
+                self._resizeqbuffer()
+
+    def _resizeqbuffer(self):
+        maxlen = self.maxlen + self.extrasize
+        # positions dropped on the left shift the index back
+        self.idx -= max(0, len(self.array) - maxlen)
+        self.array = QBufferArray(self.array, maxlen=maxlen)
 
     def __len__(self):
-        return self.idx + 1
+        return self.lencount
+
+    def savestate(self):
+        '''
+        Returns the values and the pointers of the buffer, to be restored
+        with loadstate (checkpoints)
+        '''
+        larray = self.array
+        if not isinstance(larray, (array.array, collections.deque)):
+            larray = array.array(str(self.typecode), larray)  # ex: memoryview
+
+        return larray, self.idx, self.lencount, self.extension
+
+    def loadstate(self, state):
+        self.array, self.idx, self.lencount, self.extension = state
 
     def buflen(self):
         ''' Real data that can be currently held in the internal buffer
@@ -99,7 +215,9 @@ class LineBuffer(LineSingle):
         held/can be held in the buffer
         is returned
         '''
-        return len(self.array) - self.extension
+        # positions ahead of the index (non-delivered) plus the delivered
+        # ones, which in QBuffer mode may no longer all be in the buffer
+        return self.lencount + len(self.array) - self.idx - 1 - self.extension
 
     def __getitem__(self, ago):
         return self.array[self.idx + ago]
@@ -118,6 +236,10 @@ class LineBuffer(LineSingle):
         Returns:
             A slice of the underlying buffer
         '''
+        if self.mode == self.QBuffer:
+            start = self.idx + ago - size + 1
+            return list(itertools.islice(self.array, start, start + size))
+
         return self.array[self.idx + ago - size + 1:self.idx + ago + 1]
 
     def getzero(self, idx=0, size=1):
@@ -163,6 +285,7 @@ class LineBuffer(LineSingle):
         out with buflen
         '''
         self.idx = -1
+        self.lencount = 0
 
     def forward(self, value=NAN, size=1):
         ''' Moves the logical index foward and enlarges the buffer as much as needed
@@ -171,10 +294,47 @@ class LineBuffer(LineSingle):
             value (variable): value to be set in new positins
             size (int): How many extra positions to enlarge the buffer
         '''
+        if self.mode == self.QBuffer:
+            # positions dropped on the left keep the index in place
+            self.idx -= max(0, len(self.array) + size - self.array.maxlen)
+
         self.idx += size
+        self.lencount += size
         for i in range(size):
             self.array.append(value)
 
+    def forwardvalues(self, values):
+        ''' Moves the logical index forward over the given values, as if
+        forward and set had been called for each of them
+
+        Keyword Args:
+            values (array.array): values for the new positions
+
+        Only for UnBounded mode
+        '''
+        idx = self.idx + 1
+        self.array[idx:idx] = values  # positions from extend stay at the end
+        self.idx += len(values)
+        self.lencount += len(values)
+
+    def forwardbuffer(self, values):
+        ''' Like forwardvalues but for an empty buffer, which is replaced by
+        values without copying them
+
+        Keyword Args:
+            values (memoryview): a sequence of doubles (it may be read-only
+            and can neither grow nor shrink)
+
+        Only for UnBounded mode. The positions already added with extend
+        (lookahead) are kept after the values, which are then copied
+        '''
+        if self.extension:
+            values = array.array(str(self.typecode), values) + self.array
+
+        self.array = values
+        self.idx = len(values) - self.extension - 1
+        self.lencount = self.idx + 1
+
     def backwards(self, size=1):
         ''' Moves the logical index backwards and reduces the buffer as much as needed
 
@@ -184,11 +344,13 @@ class LineBuffer(LineSingle):
 
         '''
         self.idx -= size
+        self.lencount -= size
         for i in range(size):
             self.array.pop()
 
     def rewind(self, size=1):
         self.idx -= size
+        self.lencount -= size
 
     def advance(self, size=1):
         ''' Advances the logical index without touching the underlying buffer
@@ -197,6 +359,15 @@ class LineBuffer(LineSingle):
             size (int): How many extra positions to move forward
         '''
         self.idx += size
+        self.lencount += size
+
+    def enlarge(self, size, value=NAN):
+        ''' Adds positions after the last one of the buffer without moving the
+        index, to let them be calculated in "once" mode after the buffer has
+        been (pre)loaded/calculated
+        '''
+        for i in range(size):
+            self.array.append(value)
 
     def extend(self, value=NAN, size=0):
         ''' Extends the underlying array with positions that the index will not reach
@@ -208,6 +379,9 @@ class LineBuffer(LineSingle):
         The purpose is to allow for lookahead operations or to be able to
         set values in the buffer "future"
         '''
+        if self.mode == self.QBuffer:
+            self.idx -= max(0, len(self.array) + size - self.array.maxlen)
+
         self.extension += size
         for i in range(size):
             self.array.append(value)
@@ -243,14 +417,14 @@ class LineBuffer(LineSingle):
     def plotrange(self, start, end):
         return self.array[start:end]
 
-    def oncebinding(self):
+    def oncebinding(self, start=0):
         '''
-        Executes the bindings when running in "once" mode
+        Executes the bindings when running in "once" mode (from start on)
         '''
         larray = self.array
         blen = self.buflen()
         for binding in self.bindings:
-            binding.array[0:blen] = larray[0:blen]
+            binding.array[start:blen] = larray[start:blen]
 
     def bind2lines(self, binding=0):
         '''
@@ -281,7 +455,19 @@ class LineBuffer(LineSingle):
         return LineOwnOperation(self, operation, _ownerskip=None)
 
     def datetime(self, ago=0):
-        return num2date(self.array[self.idx + ago])
+        x = self.array[self.idx + ago]
+        # the same few values are usually decoded several times per bar
+        dtmemo = self._dtmemo
+        try:
+            return dtmemo[x]
+        except KeyError:
+            pass
+
+        if len(dtmemo) >= self._DTMEMO:
+            dtmemo.clear()
+
+        dt = dtmemo[x] = num2date(x)
+        return dt
 
     def date(self, ago=0):
         return self.datetime(ago).date()
@@ -289,6 +475,13 @@ class LineBuffer(LineSingle):
     def time(self, ago=0):
         return self.datetime(ago).time()
 
+    def ordtime(self, ago=0):
+        '''
+        Returns the day ordinal and the microseconds since midnight of the
+        datetime at ago, as integers which can be directly compared
+        '''
+        return num2ordtime(self.array[self.idx + ago])
+
 
 class MetaLineActions(LineBuffer.__class__):
     '''
@@ -304,6 +497,12 @@ class MetaLineActions(LineBuffer.__class__):
         _obj, args, kwargs = \
             super(MetaLineActions, cls).dopreinit(_obj, *args, **kwargs)
 
+        # Keep the operands which are lines (needed to size their buffers)
+        _obj._datas = [x for x in args if isinstance(x, LineRoot)]
+
+        # Run "once" vectorized with numpy if the owner does
+        _obj._vectorize = getattr(_obj._owner, '_vectorize', False)
+
         # Do not produce anything until the operation lines produce something
         _minperiod = \
             max([x._minperiod for x in args if isinstance(x, LineSingle)])
@@ -356,6 +555,11 @@ class LineActions(six.with_metaclass(MetaLineActions, LineBuffer)):
 
         return obj
 
+    def qbuffer(self, extrasize=1):
+        super(LineActions, self).qbuffer(extrasize=extrasize)
+        for data in self._datas:
+            data.minbuffer(self._minperiod)
+
     def _next(self):
         clock_len = len(self._owner)
         if clock_len > len(self):
@@ -379,6 +583,15 @@ class LineActions(six.with_metaclass(MetaLineActions, LineBuffer)):
 
         self.oncebinding()
 
+    def _oncemore(self):
+        # calculate only the positions added to the owner after _once
+        start = self.buflen()
+        end = self._owner.buflen()
+        self.enlarge(end - start)
+
+        self._oncerange(start, end)
+        self.oncebinding(start)
+
 
 class LineDelay(LineActions):
     '''
@@ -389,12 +602,16 @@ class LineDelay(LineActions):
         super(LineDelay, self).__init__()
         self.a = a
         self.ago = ago
+        self._cachekey = cachekey(self.__class__, a, ago)
 
         # Need to add the delay to the period. "ago" is 0 based and therefore
         # we need to pass and extra 1 which is the minimum defined period for
         # any data (which will be substracted inside addminperiod)
         self.addminperiod(abs(ago) + 1)
 
+        if self._vectorize:
+            self.once = self._once_np
+
     def next(self):
         self[0] = self.a[self.ago]
 
@@ -407,6 +624,15 @@ class LineDelay(LineActions):
         for i in xrange(start, end):
             dst[i] = src[i + ago]
 
+    def _once_np(self, start, end):
+        if start + self.ago < 0:
+            # negative indices wrap around: keep the element-wise semantics
+            return LineDelay.once(self, start, end)
+
+        dst = npview(self.array)
+        src = npview(self.a.array)
+        dst[start:end] = src[start + self.ago:end + self.ago]
+
 
 class LinesOperation(LineActions):
     '''
@@ -439,9 +665,19 @@ class LinesOperation(LineActions):
             self.next = self._next_val_op if not r else self._next_val_op_r
             self.once = self._once_val_op if not r else self._once_val_op_r
 
+        if self._vectorize and operation in NPOPS:
+            self.npop = NPOPS[operation]
+            if isinstance(b, LineBuffer):
+                self.once = self._once_np
+            else:
+                self.once = \
+                    self._once_val_op_np if not r else self._once_val_op_r_np
+
         if r:
             self.a, self.b = b, a
 
+        self._cachekey = cachekey(self.__class__, operation, self.a, self.b)
+
     def next(self):
         self[0] = self.operation(self.a[0], self.b[0])
 
@@ -481,6 +717,28 @@ class LinesOperation(LineActions):
         for i in xrange(start, end):
             dst[i] = op(srca, srcb[i])
 
+    def _once_np(self, start, end):
+        dst = npview(self.array)
+        srca = npview(self.a.array)
+        srcb = npview(self.b.array)
+
+        with np.errstate(all='ignore'):
+            dst[start:end] = self.npop(srca[start:end], srcb[start:end])
+
+    def _once_val_op_np(self, start, end):
+        dst = npview(self.array)
+        srca = npview(self.a.array)
+
+        with np.errstate(all='ignore'):
+            dst[start:end] = self.npop(srca[start:end], self.b)
+
+    def _once_val_op_r_np(self, start, end):
+        dst = npview(self.array)
+        srcb = npview(self.b.array)
+
+        with np.errstate(all='ignore'):
+            dst[start:end] = self.npop(self.a, srcb[start:end])
+
 
 class LineOwnOperation(LineActions):
     '''
@@ -494,6 +752,11 @@ class LineOwnOperation(LineActions):
 
         self.operation = operation
         self.a = a
+        self._cachekey = cachekey(self.__class__, operation, a)
+
+        if self._vectorize and operation in NPOPS:
+            self.npop = NPOPS[operation]
+            self.once = self._once_np
 
     def next(self):
         self[0] = self.operation(self.a[0])
@@ -506,3 +769,10 @@ class LineOwnOperation(LineActions):
 
         for i in xrange(start, end):
             dst[i] = op(srca[i])
+
+    def _once_np(self, start, end):
+        dst = npview(self.array)
+        srca = npview(self.a.array)
+
+        with np.errstate(all='ignore'):
+            dst[start:end] = self.npop(srca[start:end])
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''
+
+.. module:: linefusion
+
+Fusion of the chains of line operations created by the arithmetic operators
+of the lines. An expression like ``abs(a / b - c)`` creates 3 operations, each
+one with a full buffer and a pass over the bars. If the inner operations have
+no other consumer they are inlined into the outer one, which gets a single
+compiled kernel calculating the whole expression from the input lines. The
+inlined operations are unregistered from their owner and their buffers never
+grow
+
+.. moduleauthor:: Daniel Rodriguez
+
+'''
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import __future__
+import gc
+import operator
+import sys
+
+from six.moves import xrange
+
+from .linebuffer import LineBuffer, LinesOperation, LineOwnOperation
+from .lineiterator import LineIterator
+from .utils.npsupport import np, npview, NPOPS
+
+
+# Operations written as python expressions in the kernels. The others are
+# called by name
+_PYOPS = {
+    operator.__add__: '(%s + %s)',
+    operator.__sub__: '(%s - %s)',
+    operator.__mul__: '(%s * %s)',
+    operator.__truediv__: '(%s / %s)',
+    operator.__pow__: '(%s ** %s)',
+    operator.__lt__: '(%s < %s)',
+    operator.__gt__: '(%s > %s)',
+    operator.__le__: '(%s <= %s)',
+    operator.__ge__: '(%s >= %s)',
+    operator.__eq__: '(%s == %s)',
+    operator.__ne__: '(%s != %s)',
+    operator.__abs__: 'abs(%s)',
+    abs: 'abs(%s)',
+}
+
+# Operations which return a float when the operands are floats or ints. The
+# results of the others (bools for comparisons, complex for pow) are converted
+# with float, as storing them in the buffer of the inlined operation would do
+_FLOATOPS = frozenset([
+    operator.__add__, operator.__sub__, operator.__mul__,
+    operator.__truediv__, operator.__abs__, abs,
+])
+
+_FUSABLE = (LinesOperation, LineOwnOperation)
+
+_ONCE = '''
+def once(start, end):
+    dst = line.array
+    %s
+    for i in xrange(start, end):
+        dst[i] = %s
+'''
+
+_ONCE_NP = '''
+def once(start, end):
+    dst = npview(line.array)
+    %s
+    with np.errstate(all='ignore'):
+        dst[start:end] = %s
+'''
+
+_NEXT = '''
+def next():
+    line[0] = %s
+'''
+
+_FLAGS = __future__.division.compiler_flag
+
+
+def _operands(operation):
+    if isinstance(operation, LinesOperation):
+        return [operation.a, operation.b]
+
+    return [operation.a]
+
+
+class _Kernel(object):
+    '''
+    Builds the python (next and once) and numpy (vectorized once) expressions
+    of a tree of inlined operations. Input lines are leaves and each one is
+    read a single time per bar
+    '''
+    def __init__(self, fused):
+        self.fused = fused
+        self.names = dict()
+        self.namespace = dict(xrange=xrange, float=float, np=np, npview=npview)
+        self.leaves = list()
+
+    def bind(self, prefix, obj):
+        name = self.names.get(id(obj))
+        if name is None:
+            name = self.names[id(obj)] = '%s%d' % (prefix, len(self.names))
+            self.namespace[name] = obj
+            if prefix == 'l':
+                self.leaves.append((name, obj))
+
+        return name
+
+    def expr(self, operation, vector, inlined=False):
+        args = list()
+        floatargs = True
+        for operand in _operands(operation):
+            if id(operand) in self.fused:
+                args.append(self.expr(operand, vector, inlined=True))
+            elif isinstance(operand, LineBuffer):
+                args.append('%s_' % self.bind('l', operand))
+            else:
+                args.append(self.bind('c', operand))
+                floatargs = floatargs and type(operand) in (float, int)
+
+        op = operation.operation
+        if vector:
+            expr = '%s(%s)' % (self.bind('f', NPOPS[op]), ', '.join(args))
+            if inlined:
+                expr = 'np.asarray(%s, dtype=np.float64)' % expr
+            return expr
+
+        if op in _PYOPS:
+            expr = _PYOPS[op] % tuple(args)
+        else:
+            expr = '%s(%s)' % (self.bind('f', op), ', '.join(args))
+
+        if inlined and not (op in _FLOATOPS and floatargs):
+            expr = 'float(%s)' % expr
+
+        return expr
+
+    def compile(self, source, fname):
+        exec(compile(source, '<fused>', 'exec', _FLAGS, True), self.namespace)
+        return self.namespace.pop(fname)
+
+    def install(self, root):
+        self.namespace['line'] = root
+
+        pyexpr = self.expr(root, vector=False)
+        nextexpr = pyexpr
+        onceexpr = pyexpr
+        for name, leaf in self.leaves:
+            nextexpr = nextexpr.replace('%s_' % name, '%s[0]' % name)
+            onceexpr = onceexpr.replace('%s_' % name, '%s_[i]' % name)
+
+        prologue = '; '.join('%s_ = %s.array' % (name, name)
+                             for name, leaf in self.leaves)
+
+        root.next = self.compile(_NEXT % nextexpr, 'next')
+        root.once = self.compile(_ONCE % (prologue, onceexpr), 'once')
+
+        if root._vectorize:
+            npexpr = self.expr(root, vector=True)
+            prologue = '; '.join(
+                '%s_ = npview(%s.array)[start:end]' % (name, name)
+                for name, leaf in self.leaves)
+            root.once = self.compile(_ONCE_NP % (prologue, npexpr), 'once')
+
+        # the buffers of the inputs have to be sized by the fused operation
+        root._datas = [leaf for name, leaf in self.leaves]
+
+
+class OperationFusion(object):
+    '''
+    Inlines the line operations (LinesOperation, LineOwnOperation) of a
+    strategy and of all objects under it into their consumer when:
+
+      - the consumer is also a line operation with the same owner
+      - nothing else references them. The referrers (gc) may only be the
+        consumer, the list of line iterators of the owner and the methods
+        bound to the operation itself: any other object (another operation,
+        an indicator, a binding, an attribute, a closure, a container) means
+        the values of the operation may be read
+
+    If own is False, the operations owned by the strategy itself are not
+    inlined (only those inside indicators and observers)
+
+    If vectorized, only the operations with a numpy counterpart are fused
+    '''
+    def __init__(self, strategy, own=True):
+        self.strategy = strategy
+        self.own = own
+        self.owners = list()
+        self.consumers = dict()
+
+        owners = [strategy]
+        while owners:
+            owner = owners.pop()
+            self.owners.append(owner)
+            for lineiterators in owner._lineiterators.values():
+                for obj in lineiterators:
+                    if isinstance(obj, LineIterator):
+                        owners.append(obj)
+                    elif type(obj) in _FUSABLE:
+                        for operand in _operands(obj):
+                            if type(operand) in _FUSABLE:
+                                self.consumers[id(operand)] = obj
+
+    @staticmethod
+    def fusable(obj):
+        return type(obj) in _FUSABLE and \
+            (not obj._vectorize or obj.operation in NPOPS)
+
+    @staticmethod
+    def referrers(objs):
+        '''
+        Returns a dict id(obj) -> list of the referrers of obj for the objects
+        in the list objs with a single pass over the objects tracked by gc.
+        objs itself is not a referrer
+        '''
+        byid = dict((id(obj), list()) for obj in objs)
+        for ref in gc.get_referrers(*objs):
+            if ref is not objs:
+                for obj in gc.get_referents(ref):
+                    refs = byid.get(id(obj))
+                    if refs is not None:
+                        refs.append(ref)
+
+        return byid
+
+    def candidates(self):
+        # operations which could be fused if they are not referenced
+        cands = list()
+        for owner in self.owners:
+            if owner is self.strategy and not self.own:
+                continue
+
+            for obj in owner._lineiterators[LineIterator.IndType]:
+                consumer = self.consumers.get(id(obj))
+                if consumer is not None and not obj.bindings and \
+                   consumer._owner is obj._owner and \
+                   self.fusable(obj) and self.fusable(consumer):
+                    cands.append(obj)
+
+        return cands
+
+    @staticmethod
+    def ownmethods(obj):
+        # the methods bound to obj and kept by it (ex: next and once)
+        methods = list()
+        for value in vars(obj).values():
+            if getattr(value, '__self__', None) is obj:
+                methods.append(value)
+
+        return methods
+
+    def unreferenced(self, cands):
+        '''
+        Returns the ids of the operations in cands whose only referrers are
+        the consumer (its attributes and list of datas), the line iterators
+        of the owner and itself (also with methods bound to it and only kept
+        by it)
+
+        No generator or comprehension may use obj: it would be kept in a
+        cell, which is also a referrer
+        '''
+        # the methods bound to the operations are looked up in the same pass
+        # over the objects
+        objs = list(cands)
+        for obj in cands:
+            objs.extend(self.ownmethods(obj))
+
+        byid = self.referrers(objs)
+
+        # the fusion itself: its frames, the map of consumers and the lists
+        common = set((id(self.consumers), id(cands), id(objs), id(byid)))
+        frame = sys._getframe()
+        while frame is not None:
+            common.add(id(frame))
+            frame = frame.f_back
+
+        unrefs = set()
+        for obj in cands:
+            own = set((id(obj), id(vars(obj))))
+            own.update(common)
+
+            consumer = self.consumers[id(obj)]
+            allowed = set((
+                id(consumer), id(vars(consumer)), id(consumer._datas),
+                id(obj._owner._lineiterators[LineIterator.IndType])))
+            allowed.update(own)
+            allowed.update(id(x) for x in self.ownmethods(obj))
+
+            # its bound methods may only be kept by the operation itself
+            unref = all(id(ref) in allowed for ref in byid[id(obj)])
+            for method in self.ownmethods(obj):
+                unref = unref and \
+                    all(id(ref) in own for ref in byid[id(method)])
+
+            if unref:
+                unrefs.add(id(obj))
+
+        return unrefs
+
+    def fuse(self):
+        cands = self.candidates()
+        if not cands:
+            return 0
+
+        fused = self.unreferenced(cands)
+        if not fused:
+            return 0
+
+        for owner in self.owners:
+            actions = owner._lineiterators[LineIterator.IndType]
+            for obj in actions:
+                if id(obj) not in fused and self.fusable(obj) and \
+                   any(id(x) in fused for x in _operands(obj)):
+                    _Kernel(fused).install(obj)
+
+            actions[:] = [x for x in actions if id(x) not in fused]
+
+        return len(fused)
+
+
+def fuseoperations(strategy, own=True):
+    '''
+    Fuses the chains of line operations of strategy (unless own is False)
+    and of the objects under it and returns the number of inlined operations
+    '''
+    return OperationFusion(strategy, own=own).fuse()
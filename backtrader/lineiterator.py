@@ -22,10 +22,15 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 import collections
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
 import operator
 
 import six
 
+from .linebuffer import LineBuffer
 from .lineroot import LineRoot
 from .lineseries import LineSeries, LineSeriesMaker
 from .dataseries import DataSeries
@@ -84,6 +89,9 @@ class MetaLineIterator(LineSeries.__class__):
         # 1st data source is our ticking clock
         _obj._clock = _obj.datas[0]
 
+        # Run "once" vectorized with numpy if the owner does
+        _obj._vectorize = getattr(_obj._owner, '_vectorize', False)
+
         # To automatically set the period Start by scanning the found datas
         # No calculation can take place until all datas have yielded "data"
         # A data could be an indicator and it could take x bars until
@@ -150,6 +158,21 @@ class LineIterator(six.with_metaclass(MetaLineIterator, LineSeries)):
             for lineiterator in lineiterators:
                 lineiterator._stage2()
 
+    def qbuffer(self, extrasize=1):
+        '''
+        Puts the lines of this object and of the indicators/observers under
+        it in QBuffer mode and asks the datas to keep enough values for the
+        minimum period of this object
+        '''
+        self.lines.qbuffer(extrasize=extrasize)
+
+        for lineiterators in self._lineiterators.values():
+            for lineiterator in lineiterators:
+                lineiterator.qbuffer(extrasize=extrasize)
+
+        for data in self.datas:
+            data.minbuffer(self._minperiod)
+
     def getindicators(self):
         return self._lineiterators[LineIterator.IndType]
 
@@ -166,7 +189,7 @@ class LineIterator(six.with_metaclass(MetaLineIterator, LineSeries)):
 
         if isinstance(owner, six.string_types):
             owner = [owner]
-        elif not isinstance(owner, collections.Iterable):
+        elif not isinstance(owner, Iterable):
             owner = [owner]
 
         if not own:
@@ -174,7 +197,7 @@ class LineIterator(six.with_metaclass(MetaLineIterator, LineSeries)):
 
         if isinstance(own, six.string_types):
             own = [own]
-        elif not isinstance(own, collections.Iterable):
+        elif not isinstance(own, Iterable):
             own = [own]
 
         for lineowner, lineown in zip(owner, own):
@@ -259,6 +282,41 @@ class LineIterator(six.with_metaclass(MetaLineIterator, LineSeries)):
         for line in self.lines:
             line.oncebinding()
 
+    def _oncemore(self):
+        '''
+        Calculates in "once" mode only the positions which the clock has
+        gained since _once was run (for example because new bars have been
+        appended to a preloaded data), continuing from the calculated ones
+        '''
+        start = self.buflen()
+        end = self._clock.buflen()
+        self.lines.enlarge(end - start)
+
+        for indicator in self._lineiterators[LineIterator.IndType]:
+            indicator._oncemore()
+
+        for observer in self._lineiterators[LineIterator.ObsType]:
+            observer.lines.enlarge(self.buflen() - observer.buflen())
+
+        # generic "once" implementations move the pointers of the datas and
+        # indicators along with their own. Put all at the start and restore
+        # them afterwards
+        others = self.datas + self._lineiterators[LineIterator.IndType]
+        lens = [len(other) for other in others]
+        for other in others:
+            _seek(other, start)
+
+        _seek(self, start)
+        self._oncerange(start, end)
+
+        for line in self.lines:
+            line.oncebinding(start)
+
+        for other, olen in zip(others, lens):
+            _seek(other, olen)
+
+        _seek(self, start)
+
     def preonce(self, start, end):
         pass
 
@@ -288,6 +346,15 @@ class LineIterator(six.with_metaclass(MetaLineIterator, LineSeries)):
         pass
 
 
+def _seek(obj, size):
+    # leave the pointer of a line/lines holder with size delivered positions
+    if not isinstance(obj, LineBuffer):
+        obj = obj.lines
+
+    obj.home()
+    obj.advance(size)
+
+
 # This 3 subclasses can be used for identification purposes within LineIterator
 # or even outside (like in LineObservers)
 # for the 3 subbranches without generating circular import references
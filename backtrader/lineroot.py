@@ -47,8 +47,7 @@ class MetaLineRoot(metabase.MetaParams):
     def donew(cls, *args, **kwargs):
         _obj, args, kwargs = super(MetaLineRoot, cls).donew(*args, **kwargs)
 
-        # Find the owner and store it
-        # startlevel = 4 ... to skip intermediate call stacks
+        # Find the owner (innermost object in construction) and store it
         ownerskip = kwargs.pop('_ownerskip', None)
         _obj._owner = metabase.findowner(_obj,
                                          _obj._OwnerCls or LineMultiple,
@@ -70,6 +69,7 @@ class LineRoot(six.with_metaclass(MetaLineRoot, object)):
     '''
     _OwnerCls = None
     _minperiod = 1
+    _cachekey = None
 
     IndType, StratType, ObsType = range(3)
 
@@ -151,6 +151,21 @@ class LineRoot(six.with_metaclass(MetaLineRoot, object)):
         '''
         pass
 
+    def _oncerange(self, start, end):
+        '''
+        Calls preonce, oncestart and once for the parts of [start, end) which
+        fall in each phase of the minperiod
+        '''
+        minperiod = self._minperiod
+        if start < minperiod - 1:
+            self.preonce(start, min(end, minperiod - 1))
+
+        if start <= minperiod - 1 < end:
+            self.oncestart(minperiod - 1, minperiod)
+
+        if end > max(start, minperiod):
+            self.once(max(start, minperiod), end)
+
     # Arithmetic operators
     def _makeoperation(self, other, operation, r=False, _ownerskip=None):
         raise NotImplementedError
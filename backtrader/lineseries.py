@@ -248,12 +248,19 @@ class Lines(object):
         for line in self.lines:
             line.home()
 
-    def advance(self):
+    def advance(self, size=1):
         '''
         Proxy line operation
         '''
         for line in self.lines:
-            line.advance()
+            line.advance(size)
+
+    def enlarge(self, size):
+        '''
+        Proxy line operation
+        '''
+        for line in self.lines:
+            line.enlarge(size)
 
     def buflen(self, line=0):
         '''
@@ -261,6 +268,33 @@ class Lines(object):
         '''
         return self.lines[line].buflen()
 
+    def qbuffer(self, extrasize=1):
+        '''
+        Proxy line operation
+        '''
+        for line in self.lines:
+            line.qbuffer(extrasize=extrasize)
+
+    def minbuffer(self, size):
+        '''
+        Proxy line operation
+        '''
+        for line in self.lines:
+            line.minbuffer(size)
+
+    def savestate(self):
+        '''
+        Proxy line operation
+        '''
+        return [line.savestate() for line in self.lines]
+
+    def loadstate(self, state):
+        '''
+        Proxy line operation
+        '''
+        for line, linestate in zip(self.lines, state):
+            line.loadstate(linestate)
+
 
 class MetaLineSeries(LineMultiple.__class__):
     '''
@@ -418,6 +452,16 @@ class LineSeries(six.with_metaclass(MetaLineSeries, LineMultiple)):
         super(LineSeries, self).__init__()
         pass
 
+    def savestate(self):
+        '''
+        Returns the state of the object for a checkpoint. Subclasses with
+        state out of the lines extend the returned dict
+        '''
+        return dict(lines=self.lines.savestate())
+
+    def loadstate(self, state):
+        self.lines.loadstate(state['lines'])
+
     def plotlabel(self):
         label = self.plotinfo.plotname or self.__class__.__name__
         sublabels = self._plotlabel()
@@ -445,6 +489,7 @@ class LineSeriesStub(LineSeries):
         # give a change to find the line owner (for plotting at least)
         self.owner = line._owner
         self._minperiod = line._minperiod
+        self._cachekey = line._cachekey
 
 
 def LineSeriesMaker(arg):
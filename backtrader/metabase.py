@@ -25,8 +25,8 @@ try:
     from collections import OrderedDict
 except ImportError:
     from .utils.ordereddict import OrderedDict
-import itertools
-import sys
+import contextlib
+import threading
 
 
 def findbases(kls, topclass):
@@ -39,36 +39,48 @@ def findbases(kls, topclass):
     return retval
 
 
-def findowner(owned, cls, startlevel=2, skip=None):
-    # skip this frame and the caller's -> start at 2
-    for framelevel in itertools.count(startlevel):
-        try:
-            frame = sys._getframe(framelevel)
-        except ValueError:
-            # Frame depth exceeded ... no owner ... break away
-            break
-
-        # 'self' in regular code
-        self_ = frame.f_locals.get('self', None)
-        if skip is not self_:
-            if self_ is not owned and isinstance(self_, cls):
-                return self_
-
-        # '_obj' in metaclasses
-        obj_ = frame.f_locals.get('_obj', None)
-        if skip is not obj_:
-            if obj_ is not owned and isinstance(obj_, cls):
-                return obj_
+class _Owners(threading.local):
+    # Per thread stack of the objects under construction (from donew until
+    # dopostinit is over) and of those set with "ownercontext"
+    def __init__(self):
+        self.stack = list()
+
+
+_owners = _Owners()
+
+
+def findowner(owned, cls, skip=None):
+    # the innermost object in construction which is an instance of cls
+    for owner in reversed(_owners.stack):
+        if owner is not owned and owner is not skip and \
+           isinstance(owner, cls):
+            return owner
 
     return None
 
 
+@contextlib.contextmanager
+def ownercontext(owner):
+    '''
+    Makes owner the owner (if of the sought class) of the objects created
+    inside the with block, for objects created in a regular method and not
+    during the construction of their owner
+    '''
+    _owners.stack.append(owner)
+    try:
+        yield owner
+    finally:
+        _owners.stack.pop()
+
+
 class MetaBase(type):
     def doprenew(cls, *args, **kwargs):
         return cls, args, kwargs
 
     def donew(cls, *args, **kwargs):
         _obj = cls.__new__(cls, *args, **kwargs)
+        # owner of what is created until the construction is over
+        _owners.stack.append(_obj)
         return _obj, args, kwargs
 
     def dopreinit(cls, _obj, *args, **kwargs):
@@ -82,11 +94,17 @@ class MetaBase(type):
         return _obj, args, kwargs
 
     def __call__(cls, *args, **kwargs):
-        cls, args, kwargs = cls.doprenew(*args, **kwargs)
-        _obj, args, kwargs = cls.donew(*args, **kwargs)
-        _obj, args, kwargs = cls.dopreinit(_obj, *args, **kwargs)
-        _obj, args, kwargs = cls.doinit(_obj, *args, **kwargs)
-        _obj, args, kwargs = cls.dopostinit(_obj, *args, **kwargs)
+        owners = _owners.stack
+        depth = len(owners)
+        try:
+            cls, args, kwargs = cls.doprenew(*args, **kwargs)
+            _obj, args, kwargs = cls.donew(*args, **kwargs)
+            _obj, args, kwargs = cls.dopreinit(_obj, *args, **kwargs)
+            _obj, args, kwargs = cls.doinit(_obj, *args, **kwargs)
+            _obj, args, kwargs = cls.dopostinit(_obj, *args, **kwargs)
+        finally:
+            del owners[depth:]
+
         return _obj
 
 
@@ -47,6 +47,17 @@ class CashValueObserver(LineObserver):
         self.maxdrawdown = 0.0
         self.peak = float('-inf')
 
+    def savestate(self):
+        state = super(CashValueObserver, self).savestate()
+        state['maxdrawdown'] = self.maxdrawdown
+        state['peak'] = self.peak
+        return state
+
+    def loadstate(self, state):
+        super(CashValueObserver, self).loadstate(state)
+        self.maxdrawdown = state['maxdrawdown']
+        self.peak = state['peak']
+
     def next(self):
         self.lines.cash[0] = self._owner.broker.getcash()
         self.lines.value[0] = value = self._owner.broker.getvalue()
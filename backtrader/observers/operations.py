@@ -39,6 +39,17 @@ class _OperationsPnLObserver(LineObserver):
         self.operation = Operation()
         self.operations = list()
 
+    def savestate(self):
+        state = super(_OperationsPnLObserver, self).savestate()
+        state['operation'] = self.operation
+        state['operations'] = self.operations
+        return state
+
+    def loadstate(self, state):
+        super(_OperationsPnLObserver, self).loadstate(state)
+        self.operation = state['operation']
+        self.operations = state['operations']
+
     def next(self):
         for order in self._owner._orderspending:
             if order.data is not self.data or not order.executed.size:
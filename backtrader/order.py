@@ -21,12 +21,15 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import six
-
-from .metabase import MetaParams
+import itertools
 
 
 class OrderExecutionBit(object):
+    __slots__ = ('dt', 'size', 'price',
+                 'closed', 'opened', 'closedvalue', 'openedvalue',
+                 'closedcomm', 'openedcomm', 'value', 'comm',
+                 'psize', 'pprice',)
+
     def __init__(self,
                  dt=None, size=0, price=0.0,
                  closed=0, closedvalue=0.0, closedcomm=0.0,
@@ -52,6 +55,9 @@ class OrderExecutionBit(object):
 
 
 class OrderData(object):
+    __slots__ = ('exbits', 'dt', 'size', 'remsize', 'price', 'pricelimit',
+                 'value', 'comm', 'margin', 'psize', 'pprice',)
+
     def __init__(self, dt=None, size=0, price=0.0, pricelimit=0.0, remsize=0):
         self.exbits = list()
 
@@ -59,6 +65,7 @@ class OrderData(object):
         self.size = size
         self.remsize = remsize
         self.price = price
+        self.pricelimit = pricelimit
         if not pricelimit:
             # if no pricelimit is given, use the given price
             self.pricelimit = self.price
@@ -107,10 +114,17 @@ class OrderData(object):
         self.pprice = exbit.pprice
 
 
-class Order(six.with_metaclass(MetaParams, object)):
+class Order(object):
+    '''
+    Orders are plain objects with slots (and not MetaParams objects) to keep
+    them small and with direct attribute access, because a run can create
+    millions of them
+
+    "params" and "p" are kept as aliases of the order itself
+    '''
 
     Market, Close, Limit, Stop, StopLimit = range(5)
-    Buy, Sell, Stop, StopLimit = range(4)
+    Buy, Sell = range(2)
 
     Submitted, Accepted, Partial, Completed, \
         Canceled, Expired, Margin = range(7)
@@ -120,36 +134,50 @@ class Order(six.with_metaclass(MetaParams, object)):
         'Completed', 'Canceled', 'Expired', 'Margin'
     ]
 
-    params = (
-        ('owner', None), ('data', None), ('size', None), ('price', None),
-        ('pricelimit', None), ('exectype', None), ('valid', None),
-        ('triggered', True),
-    )
+    __slots__ = ('ref', 'owner', 'data', 'size', 'price', 'pricelimit',
+                 'exectype', 'valid', 'triggered',
+                 'status', 'created', 'executed', 'position',)
 
-    def __getattr__(self, name):
-        # dig into self.params if not found as attribute
-        # mostly for external access
-        return getattr(self.params, name)
+    # unique and increasing: gives the order in which orders were created
+    refbasis = itertools.count(1)
 
-    def __setattribute__(self, name, value):
-        if hasattr(self.params, name):
-            setattr(self.params, name, value)
-        else:
-            super(Order, self).__setattribute__(name, value)
+    # default for "triggered" if not given
+    _triggered = True
 
-    def __init__(self):
-        if self.params.exectype is None:
-            self.params.exectype = Order.Market
+    def __init__(self, owner=None, data=None, size=None, price=None,
+                 pricelimit=None, exectype=None, valid=None, triggered=None):
+
+        self.ref = next(self.refbasis)
+        self.owner = owner
+        self.data = data
+        self.size = size
+        self.price = price
+        self.pricelimit = pricelimit
+        self.exectype = Order.Market if exectype is None else exectype
+        self.valid = valid
+        self.triggered = self._triggered if triggered is None else triggered
 
         self.status = Order.Submitted
         if not self.isbuy():
-            self.params.size = -self.params.size
+            self.size = -self.size
         self.created = OrderData(dt=self.data.datetime[0],
-                                 size=self.params.size,
-                                 price=self.params.price)
-        self.executed = OrderData(remsize=self.params.size)
+                                 size=self.size,
+                                 price=self.price)
+        self.executed = OrderData(remsize=self.size)
         self.position = 0
 
+    @property
+    def params(self):
+        return self
+
+    p = params
+
+    def _getkwargs(self):
+        return dict(owner=self.owner, data=self.data, size=self.size,
+                    price=self.price, pricelimit=self.pricelimit,
+                    exectype=self.exectype, valid=self.valid,
+                    triggered=self.triggered)
+
     def setposition(self, position):
         self.position = position
 
@@ -185,12 +213,12 @@ class Order(six.with_metaclass(MetaParams, object)):
             self.status = Order.Completed
 
     def expire(self):
-        if self.params.exectype == Order.Market:
+        if self.exectype == Order.Market:
             return False  # will be executed yes or yes
 
         if self.valid and self.data.datetime[0] > self.valid:
             self.status = Order.Expired
-            self.executed = self.data.datetime[0]
+            self.executed.dt = self.data.datetime[0]
             return True
 
         return False
@@ -204,24 +232,28 @@ class Order(six.with_metaclass(MetaParams, object)):
 
 
 class BuyOrder(Order):
+    __slots__ = ()
     ordtype = Order.Buy
 
 
 class StopBuyOrder(BuyOrder):
-    pass
+    __slots__ = ()
 
 
 class StopLimitBuyOrder(BuyOrder):
-    params = (('triggered', False),)
+    __slots__ = ()
+    _triggered = False
 
 
 class SellOrder(Order):
+    __slots__ = ()
     ordtype = Order.Sell
 
 
 class StopSellOrder(SellOrder):
-    pass
+    __slots__ = ()
 
 
 class StopLimitSellOrder(SellOrder):
-    params = (('triggered', False),)
+    __slots__ = ()
+    _triggered = False
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import timeit
+
+from .linebuffer import LineActions
+from .lineiterator import LineIterator
+
+
+class ProfileNode(object):
+    '''
+    Wall time and number of calls of the calculation methods (_next, _once,
+    _oncepost) of a line iterator or line action during a run
+
+    Attributes:
+      - name: class name of the profiled object (with the operation or the
+        delay of auto-created line actions)
+      - calls: number of calls
+      - time: wall time in seconds, including the time of the children
+      - children: list of nodes for the objects calculated by this one
+    '''
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.time = 0.0
+        self.children = list()
+
+    @property
+    def selftime(self):
+        '''Wall time spent in this node excluding the children'''
+        return self.time - sum(child.time for child in self.children)
+
+    def walk(self, depth=0):
+        '''Yields (depth, node) for this node and all nodes under it'''
+        yield depth, self
+        for child in self.children:
+            for item in child.walk(depth + 1):
+                yield item
+
+    def report(self):
+        '''Returns the tree as a printable table'''
+        lines = ['%-50s %10s %12s %12s' % ('node', 'calls', 'time', 'self')]
+        for depth, node in self.walk():
+            lines.append('%-50s %10d %12.6f %12.6f' %
+                         ('  ' * depth + node.name,
+                          node.calls, node.time, node.selftime))
+
+        return '\n'.join(lines)
+
+    __str__ = report
+
+
+class Profiler(object):
+    '''
+    Replaces the calculation methods of a strategy and of all objects under
+    it with timing wrappers and builds the matching tree of ProfileNode
+
+    The wrappers are set as instance attributes only on the objects of a
+    profiled run. Unprofiled runs go through the unmodified class methods and
+    pay nothing for it
+    '''
+    methods = ('_next', '_once', '_oncepost')
+
+    timer = staticmethod(timeit.default_timer)
+
+    def profile(self, obj):
+        node = ProfileNode(self.nodename(obj))
+
+        for mname in self.methods:
+            method = getattr(obj, mname, None)
+            if method is not None:
+                setattr(obj, mname, self.wrap(node, method))
+
+        lineiterators = getattr(obj, '_lineiterators', {})
+        for ltype in (LineIterator.IndType, LineIterator.ObsType):
+            for child in lineiterators.get(ltype, []):
+                node.children.append(self.profile(child))
+
+        return node
+
+    @staticmethod
+    def nodename(obj):
+        name = obj.__class__.__name__
+        if not isinstance(obj, LineActions):
+            return name
+
+        # tell apart the line actions auto-created by operations/delays
+        operation = getattr(obj, 'operation', None)
+        if operation is not None:
+            return '%s(%s)' % (name, getattr(operation, '__name__', operation))
+
+        ago = getattr(obj, 'ago', None)
+        if ago is not None:
+            return '%s(%d)' % (name, ago)
+
+        return name
+
+    def wrap(self, node, method):
+        timer = self.timer
+
+        def wrapper(*args, **kwargs):
+            tstart = timer()
+            ret = method(*args, **kwargs)
+            node.time += timer() - tstart
+            node.calls += 1
+            return ret
+
+        return wrapper
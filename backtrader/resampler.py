@@ -30,6 +30,8 @@ from . import TimeFrame
 
 
 class BaseResampler(feed.DataBase):
+    _follower = True
+
     def __init__(self, data):
         self.data = data
         self._name = getattr(data, '_name', '')
@@ -38,6 +40,17 @@ class BaseResampler(feed.DataBase):
         super(BaseResampler, self).start()
         self._samplecount = 0
 
+    def savestate(self):
+        state = super(BaseResampler, self).savestate()
+        state['data'] = self.data.savestate()
+        state['samplecount'] = self._samplecount
+        return state
+
+    def loadstate(self, state):
+        super(BaseResampler, self).loadstate(state)
+        self.data.loadstate(state['data'])
+        self._samplecount = state['samplecount']
+
     def _havebar(self):
         return not math.isnan(self.lines.open[0])
 
@@ -100,8 +113,8 @@ class BaseResampler(feed.DataBase):
         return True
 
     def _barisover_days(self, index):
-        dt = self.lines.datetime.date(index)
-        bardt = self.data.datetime.date(index)
+        dt, _ = self.lines.datetime.ordtime(index)
+        bardt, _ = self.data.datetime.ordtime(index)
 
         return bardt > dt
 
@@ -127,19 +140,17 @@ class BaseResampler(feed.DataBase):
         return bardt.year > dt.year
 
     def _barisover_minutes(self, index):
-        dt = self.lines.datetime.date(index)
-        bardt = self.data.datetime.date(index)
-
-        tm = self.lines.datetime.time(index)
-        bartm = self.data.datetime.time(index)
+        # days and microseconds of the day: no datetime has to be created
+        dt, tm = self.lines.datetime.ordtime(index)
+        bardt, bartm = self.data.datetime.ordtime(index)
 
         if bardt > dt:
             # TODO: Sessions and not only dates/days should be considered
             return True
 
-        tmpoint = tm.hour * 60 + tm.minute
+        tmpoint = tm // 60000000  # minutes
         tmmul, tmrem = divmod(tmpoint, self.p.compression)
-        bartmpoint = bartm.hour * 60 + bartm.minute
+        bartmpoint = bartm // 60000000
         bartmmul, bartmrem = divmod(bartmpoint, self.p.compression)
 
         if bartmmul > tmmul and bartmrem:
@@ -159,6 +170,15 @@ class DataResampler(BaseResampler):
         self._preloading = False
         self.lastbar = 0
 
+    def savestate(self):
+        state = super(DataResampler, self).savestate()
+        state['lastbar'] = self.lastbar
+        return state
+
+    def loadstate(self, state):
+        super(DataResampler, self).loadstate(state)
+        self.lastbar = state['lastbar']
+
     def preload(self):
         if len(self.data) == self.data.buflen():
             # if data is not preloaded .... do it
@@ -218,6 +238,15 @@ class DataReplayer(BaseResampler):
         super(DataReplayer, self).start()
         self._firstbar = True
 
+    def savestate(self):
+        state = super(DataReplayer, self).savestate()
+        state['firstbar'] = self._firstbar
+        return state
+
+    def loadstate(self, state):
+        super(DataReplayer, self).loadstate(state)
+        self._firstbar = state['firstbar']
+
     def preload(self):
         raise NotImplementedError('Replay does not support preloading')
 
@@ -27,6 +27,7 @@ import operator
 import six
 
 from .broker import BrokerBack
+from .linefusion import fuseoperations
 from .lineiterator import LineIterator, StrategyBase
 from .analyzer import Analyzer
 from .sizer import SizerFix
@@ -38,6 +39,9 @@ class MetaStrategy(StrategyBase.__class__):
             super(MetaStrategy, cls).dopreinit(_obj, *args, **kwargs)
         _obj.env = env
         _obj.broker = env.broker
+        _obj._indcache = getattr(env, '_indcache', None)
+        _obj._vectorize = getattr(env, '_vectorize', False)
+        _obj._fuse = getattr(env, '_fuse', None)
         _obj._sizer = SizerFix()
         _obj._orders = list()
         _obj._orderspending = list()
@@ -100,22 +104,45 @@ class MetaStrategy(StrategyBase.__class__):
         # change operators to stage 2
         _obj._stage2()
 
+        # with all operations known, the single consumer chains can be fused
+        # (those of the strategy itself only if asked for)
+        if _obj._fuse is not False:
+            fuseoperations(_obj, own=bool(_obj._fuse))
+
         return _obj, args, kwargs
 
 
 class Strategy(six.with_metaclass(MetaStrategy, StrategyBase)):
     _ltype = LineIterator.StratType
 
+    # Tree of ProfileNode set by cerebro if the run is profiled
+    profile = None
+
     # This unnamed line is meant to allow having "len" and "forwarding"
     extralines = 1
 
     params = (('analyzer', True),)
 
     def _oncepost(self):
+        if not len(self._clock):
+            # Only other datas have delivered bars. Keep the indicators on
+            # them in sync and wait for the clock to deliver its 1st bar
+            for indicator in self._lineiterators[LineIterator.IndType]:
+                if isinstance(indicator, LineIterator):
+                    indicator.advance()
+            return
+
+        # the clock may not have moved if only other datas have a new bar
+        clockmoved = len(self) < len(self._clock)
+
         for indicator in self._lineiterators[LineIterator.IndType]:
-            indicator.advance()
+            # indicators follow their own clock, line actions follow ours
+            if clockmoved or isinstance(indicator, LineIterator):
+                indicator.advance()
+
+        if clockmoved:
+            self.advance()
 
-        self.advance()
         self._notify()
 
         # check the min period status connected to datas
@@ -130,12 +157,20 @@ class Strategy(six.with_metaclass(MetaStrategy, StrategyBase)):
             self.prenext()
 
         for observer in self._lineiterators[LineIterator.ObsType]:
-            observer.advance()
+            if clockmoved:
+                observer.advance()
             observer.next()
 
         self.clear()
 
     def _next(self):
+        if not len(self._clock):
+            # see _oncepost
+            for indicator in self._lineiterators[LineIterator.IndType]:
+                if isinstance(indicator, LineIterator):
+                    indicator._next()
+            return
+
         super(Strategy, self)._next()
         self.clear()
 
@@ -21,18 +21,23 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import datetime
+from .dateintern import (_num2date, _date2num, _num2dates, _date2nums,
+                         _num2ordtime, _num2ordtimes)
 
-from .dateintern import _num2date, _date2num
+__all__ = ('num2date', 'date2num', 'num2dates', 'date2nums',
+           'num2ordtime', 'num2ordtimes')
 
-__all__ = ('num2date', 'date2num')
+# The internal converters are always used (and return naive datetimes if no
+# tz is given). matplotlib is only imported when plotting is actually used
+# (Cerebro.plot or "import backtrader.plot") and not at "import backtrader",
+# which saves its import time for headless processes
+num2date = _num2date
+date2num = _date2num
 
-try:
-    import matplotlib.dates as mdates
-
-except ImportError:
-    num2date = _num2date
-    date2num = _date2num
-else:
-    num2date = mdates.num2date
-    date2num = mdates.date2num
+# Array level versions and the integer (day ordinal, microseconds of the day)
+# decomposition, which lets dates and times be compared without creating
+# datetime objects
+num2dates = _num2dates
+date2nums = _date2nums
+num2ordtime = _num2ordtime
+num2ordtimes = _num2ordtimes
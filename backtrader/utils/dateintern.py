@@ -21,8 +21,11 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import array
 import datetime
 
+from .npsupport import np
+
 
 # A UTC class, same as the one in the Python Docs
 class _UTC(datetime.tzinfo):
@@ -48,6 +51,7 @@ MUSECONDS_PER_SECOND = 1e6
 MINUTES_PER_DAY = MINUTES_PER_HOUR * HOURS_PER_DAY
 SECONDS_PER_DAY = SECONDS_PER_MINUTE * MINUTES_PER_DAY
 MUSECONDS_PER_DAY = MUSECONDS_PER_SECOND * SECONDS_PER_DAY
+_MUSECONDS_PER_DAY = 86400 * 1000000
 
 
 def _num2date(x, tz=None):
@@ -111,3 +115,83 @@ def _date2num(dt):
                  dt.microsecond / MUSECONDS_PER_DAY
                  )
     return base
+
+
+def _num2ordtime(x):
+    """
+    Returns the day (proleptic Gregorian ordinal) and the microseconds
+    since midnight of the (naive) datetime which _num2date(x) returns,
+    without creating it. The integers can be compared directly
+    """
+    ix = int(x)
+    remainder = float(x) - ix
+    hour, remainder = divmod(HOURS_PER_DAY * remainder, 1)
+    minute, remainder = divmod(MINUTES_PER_HOUR * remainder, 1)
+    second, remainder = divmod(SECONDS_PER_MINUTE * remainder, 1)
+    microsecond = int(MUSECONDS_PER_SECOND * remainder)
+    if microsecond < 10:
+        microsecond = 0  # compensate for rounding errors
+
+    daytime = \
+        ((int(hour) * 60 + int(minute)) * 60 + int(second)) * 1000000 + \
+        microsecond
+
+    if microsecond > 999990:  # compensate for rounding errors
+        daytime += 1000000 - microsecond
+        if daytime >= _MUSECONDS_PER_DAY:
+            return ix + 1, daytime - _MUSECONDS_PER_DAY
+
+    return ix, daytime
+
+
+def _num2dates(values, tz=None):
+    """
+    Converts a sequence of float values to a list of datetimes (see
+    _num2date). Repeated values are only converted once
+    """
+    memo = dict()
+    dts = list()
+    for x in values:
+        dt = memo.get(x)
+        if dt is None:
+            dt = memo[x] = _num2date(x, tz)
+        dts.append(dt)
+
+    return dts
+
+
+def _date2nums(dts):
+    """
+    Converts a sequence of datetimes to an array.array of float values (see
+    _date2num)
+    """
+    return array.array(str('d'), map(_date2num, dts))
+
+
+def _num2ordtimes(values):
+    """
+    Array version of _num2ordtime: returns two numpy int64 arrays with the
+    days and the microseconds since midnight of values (a numpy array or
+    anything exposing a buffer of doubles). Needs numpy
+    """
+    x = np.asarray(values, dtype=np.float64)
+    ix = np.trunc(x)
+    remainder = x - ix
+    hour, remainder = np.divmod(HOURS_PER_DAY * remainder, 1)
+    minute, remainder = np.divmod(MINUTES_PER_HOUR * remainder, 1)
+    second, remainder = np.divmod(SECONDS_PER_MINUTE * remainder, 1)
+    microsecond = (MUSECONDS_PER_SECOND * remainder).astype(np.int64)
+    microsecond[microsecond < 10] = 0  # compensate for rounding errors
+
+    ords = ix.astype(np.int64)
+    daytime = \
+        ((hour.astype(np.int64) * 60 + minute.astype(np.int64)) * 60 +
+         second.astype(np.int64)) * 1000000 + microsecond
+
+    up = microsecond > 999990  # compensate for rounding errors
+    daytime[up] += 1000000 - microsecond[up]
+    nextday = daytime >= _MUSECONDS_PER_DAY
+    ords[nextday] += 1
+    daytime[nextday] -= _MUSECONDS_PER_DAY
+
+    return ords, daytime
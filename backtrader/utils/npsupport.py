@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+'''
+
+.. module:: npsupport
+
+Optional numpy support for the vectorized "once" methods. The line buffers
+keep their "array.array" storage and the vectorized methods operate on zero
+copy numpy views of it, which must not outlive the method (an array.array
+cannot be resized while a view of it exists)
+
+.. moduleauthor:: Daniel Rodriguez
+
+'''
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Python operation (as used by LinesOperation/LineOwnOperation) -> numpy
+NPOPS = dict()
+
+if np is not None:
+    NPOPS.update({
+        operator.__add__: np.add,
+        operator.__sub__: np.subtract,
+        operator.__mul__: np.multiply,
+        operator.__truediv__: np.true_divide,
+        operator.__pow__: np.power,
+        pow: np.power,
+        operator.__abs__: np.absolute,
+        abs: np.absolute,
+        operator.__lt__: np.less,
+        operator.__gt__: np.greater,
+        operator.__le__: np.less_equal,
+        operator.__ge__: np.greater_equal,
+        operator.__eq__: np.equal,
+        operator.__ne__: np.not_equal,
+        bool: lambda x: x != 0.0,  # NaN is also True
+    })
+
+
+def npview(arr):
+    '''Returns a zero copy numpy view of an array.array of doubles'''
+    return np.frombuffer(arr, dtype=np.float64)
+
+
+def npwindows(view, period):
+    '''
+    Returns a zero copy 2d view in which row i holds the period values
+    ending at position i + period - 1 of view
+    '''
+    nrows = len(view) - period + 1
+    if nrows <= 0:
+        return view[0:0].reshape(0, period)
+
+    stride = view.strides[0]
+    return np.lib.stride_tricks.as_strided(
+        view, shape=(nrows, period), strides=(stride, stride),
+        writeable=False)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import collections
+import os
+import os.path
+import subprocess
+import sys
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+# A benchmark case is run by calling func(datafile, *args) and returns the
+# number of bars which went through the platform (or of imports for "import")
+Case = collections.namedtuple('Case', ['name', 'func', 'args'])
+
+
+def getdata(datafile):
+    return bt.feeds.BacktraderCSVData(dataname=datafile)
+
+
+def preload(datafile):
+    '''Parsing and preloading of a BacktraderCSVData feed'''
+    data = getdata(datafile)
+    data.start()
+    data.preload()
+    data.stop()
+
+    return data.buflen()
+
+
+# Indicators which are bases for others and cannot be instantiated alone
+ABSTRACT = ('MovingAverageBase', 'OperationN', 'OscillatorMixIn', 'PeriodN',
+            'RSI_EMA', 'RSI_SMA',)
+
+# Inputs for the indicators which cannot take a plain data feed and defaults
+INDINPUTS = {
+    'CrossDown': lambda data: ((data.close, data.open), {}),
+    'CrossOver': lambda data: ((data.close, data.open), {}),
+    'CrossUp': lambda data: ((data.close, data.open), {}),
+    'ExponentialSmoothing': lambda data: ((data.close,), dict(alpha=0.5)),
+    'ExponentialSmoothingDynamic':
+    lambda data: ((data.close,), dict(alpha=data.low / data.high)),
+    'FindFirstIndex': lambda data: ((data.close,), dict(_evalfunc=max)),
+    'FindLastIndex': lambda data: ((data.close,), dict(_evalfunc=max)),
+    'MeanDeviation':
+    lambda data: ((data.close, btind.SMA(data.close, period=20)), {}),
+    'Oscillator': lambda data: ((data.close, data.open), {}),
+    'StandardDeviation':
+    lambda data: ((data.close, btind.SMA(data.close, period=20)), {}),
+}
+
+
+class IndicatorStrategy(bt.Strategy):
+    params = (('indname', None),)
+
+    def __init__(self):
+        indinputs = INDINPUTS.get(self.p.indname)
+        if indinputs is None:
+            args, kwargs = (self.data,), {}
+        else:
+            args, kwargs = indinputs(self.data)
+
+        bt.Indicator._indcol[self.p.indname](*args, **kwargs)
+
+
+def indicator(datafile, indname, runonce):
+    '''Calculation of a single indicator over the data'''
+    cerebro = bt.Cerebro(preload=True, runonce=runonce)
+    data = getdata(datafile)
+    cerebro.adddata(data)
+    cerebro.addstrategy(IndicatorStrategy, indname=indname)
+    cerebro.run()
+
+    return data.buflen()
+
+
+class PendingStrategy(bt.Strategy):
+    '''
+    Keeps norders limit orders pending in the broker, with prices which are
+    never reached
+    '''
+    params = (('norders', 500),)
+
+    def start(self):
+        self.orders = 0
+
+    def next(self):
+        for i in range(self.orders, self.p.norders):
+            if i % 2:
+                price = self.data.close[0] * 0.01
+                self.buy(price=price, exectype=bt.Order.Limit)
+            else:
+                price = self.data.close[0] * 100.0
+                self.sell(price=price, exectype=bt.Order.Limit)
+
+        self.orders = self.p.norders
+
+
+def broker(datafile, norders):
+    '''BrokerBack.next checking norders pending orders on each bar'''
+    cerebro = bt.Cerebro()
+    data = getdata(datafile)
+    cerebro.adddata(data)
+    cerebro.addstrategy(PendingStrategy, norders=norders)
+    cerebro.run()
+
+    return data.buflen()
+
+
+def resample(datafile, timeframe, compression):
+    '''Resampling of the data to a larger timeframe with an indicator'''
+    cerebro = bt.Cerebro()
+    data = getdata(datafile)
+    cerebro.adddata(bt.DataResampler(data=data,
+                                     timeframe=timeframe,
+                                     compression=compression))
+    cerebro.addstrategy(IndicatorStrategy, indname='MovingAverageSimple')
+    cerebro.run()
+
+    return data.buflen()
+
+
+class CrossStrategy(bt.Strategy):
+    params = (('fast', 10), ('slow', 30),)
+
+    def __init__(self):
+        fast = btind.SMA(self.data, period=self.p.fast)
+        slow = btind.SMA(self.data, period=self.p.slow)
+        self.cross = btind.CrossOver(fast, slow)
+
+    def next(self):
+        if self.cross[0] > 0.0:
+            if self.position.size <= 0:
+                self.buy()
+        elif self.cross[0] < 0.0:
+            if self.position.size >= 0:
+                self.sell()
+
+
+def optimize(datafile, fast, slow, maxcpus):
+    '''End to end optstrategy sweep of a crossover strategy'''
+    cerebro = bt.Cerebro(maxcpus=maxcpus)
+    data = getdata(datafile)
+    cerebro.adddata(data)
+    cerebro.optstrategy(CrossStrategy, fast=fast, slow=slow)
+    results = cerebro.run()
+
+    return data.buflen() * len(results)
+
+
+class SetupStrategy(bt.Strategy):
+    def __init__(self):
+        for data in self.datas:
+            sma = btind.SMA(data, period=15)
+            btind.CrossOver(data.close, sma)
+            btind.MACDHisto(data)
+            btind.Stochastic(data)
+            (data.high - data.low) / data.close(-1) > sma / data.open
+
+
+def setup(datafile, ndatas):
+    '''Construction (only) of a strategy with indicators and line operations
+    over many datas'''
+    cerebro = bt.Cerebro()
+    datas = [getdata(datafile) for i in range(ndatas)]
+    SetupStrategy(cerebro, *datas)
+
+    return ndatas
+
+
+# Run in a fresh interpreter: fails if the import pulls plotting in
+IMPORTCODE = '''
+import sys
+import backtrader
+if 'matplotlib' in sys.modules:
+    raise SystemExit('matplotlib imported by "import backtrader"')
+'''
+
+
+def importtime(datafile, nimports):
+    '''Start of fresh interpreters which "import backtrader" and nothing more
+    (as done by each of the worker processes of an optimization)'''
+    env = dict(os.environ)
+    rootdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [rootdir] + [x for x in [env.get('PYTHONPATH')] if x])
+
+    for i in range(nimports):
+        proc = subprocess.Popen([sys.executable, '-c', IMPORTCODE], env=env,
+                                stderr=subprocess.PIPE)
+        _, err = proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(err.decode('utf-8', 'replace').strip())
+
+    return nimports
+
+
+def getcases(norders=500, maxcpus=1):
+    cases = list()
+    cases.append(Case('import', importtime, (10,)))
+    cases.append(Case('preload', preload, ()))
+
+    for indname in sorted(bt.Indicator._indcol):
+        if indname in ABSTRACT:
+            continue
+
+        for runonce, mode in ((True, 'runonce'), (False, 'runnext')):
+            name = 'indicator.%s.%s' % (indname, mode)
+            cases.append(Case(name, indicator, (indname, runonce)))
+
+    cases.append(Case('setup.200', setup, (200,)))
+    cases.append(Case('broker.%d' % norders, broker, (norders,)))
+    cases.append(Case('resample.weeks', resample, (bt.TimeFrame.Weeks, 1)))
+    cases.append(Case('optimize', optimize,
+                      (range(5, 25, 5), range(30, 70, 10), maxcpus)))
+
+    return cases
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import argparse
+import datetime
+import fnmatch
+import json
+import multiprocessing
+import os
+import os.path
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+try:
+    import resource
+except ImportError:
+    resource = None  # not available on Windows
+
+try:
+    import backtrader as bt
+except ImportError:
+    # append module root directory to sys.path
+    sys.path.insert(
+        0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import backtrader as bt
+
+from benchmarks import cases
+from benchmarks import synthetic
+
+
+def peakrss():
+    '''Returns the peak resident set size of the process in bytes'''
+    if resource is None:
+        return None
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return maxrss  # already in bytes
+
+    return maxrss * 1024  # kilobytes
+
+
+def runcase(case, datafile):
+    try:
+        tstart = timeit.default_timer()
+        bars = case.func(datafile, *case.args)
+        elapsed = timeit.default_timer() - tstart
+    except Exception as e:
+        return dict(name=case.name, error='%s: %s' % (type(e).__name__, e))
+
+    return dict(name=case.name,
+                bars=bars,
+                seconds=elapsed,
+                barspersec=bars / elapsed if elapsed else None,
+                peakrss=peakrss())
+
+
+def runisolated(case, datafile):
+    # A fresh process per case keeps the peak rss of a case from being
+    # inflated by the ones which ran before it
+    pool = multiprocessing.Pool(processes=1)
+    try:
+        return pool.apply(runcase, (case, datafile))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def gitcommit():
+    try:
+        out = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return out.decode('ascii').strip()
+
+
+def runbenchmarks():
+    args = parse_args()
+
+    allcases = cases.getcases(norders=args.orders, maxcpus=args.maxcpus)
+    if args.list:
+        for case in allcases:
+            print(case.name)
+        return
+
+    if args.cases:
+        allcases = [case for case in allcases
+                    if any(fnmatch.fnmatch(case.name, pattern)
+                           for pattern in args.cases)]
+
+    tmpdir = tempfile.mkdtemp(prefix='btbench')
+    try:
+        datafile = os.path.join(tmpdir, 'synthetic.txt')
+        synthetic.writecsv(datafile, args.bars, seed=args.seed)
+
+        results = list()
+        for case in allcases:
+            if args.noisolate:
+                result = runcase(case, datafile)
+            else:
+                result = runisolated(case, datafile)
+
+            results.append(result)
+            printresult(result)
+    finally:
+        shutil.rmtree(tmpdir)
+
+    if args.json:
+        report = dict(
+            version=bt.__version__,
+            commit=gitcommit(),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            date=datetime.datetime.now().isoformat(),
+            bars=args.bars,
+            seed=args.seed,
+            results=results,
+        )
+
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+
+def printresult(result):
+    if 'error' in result:
+        print('%-60s %s' % (result['name'], result['error']))
+        return
+
+    if result['peakrss'] is None:
+        rss = '-'
+    else:
+        rss = '%.1f MB' % (result['peakrss'] / (1024.0 * 1024.0))
+
+    print('%-60s %12.1f bars/s %8.3f s %10s' %
+          (result['name'], result['barspersec'] or 0.0,
+           result['seconds'], rss))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the platform over synthetic data')
+
+    parser.add_argument('--bars', required=False, action='store',
+                        type=int, default=10000,
+                        help='Number of synthetic daily bars to generate')
+
+    parser.add_argument('--seed', required=False, action='store',
+                        type=int, default=0,
+                        help='Seed for the generation of the synthetic bars')
+
+    parser.add_argument('--orders', required=False, action='store',
+                        type=int, default=500,
+                        help='Pending orders for the broker benchmark')
+
+    parser.add_argument('--maxcpus', required=False, action='store',
+                        type=int, default=1,
+                        help='maxcpus for the optimization benchmark')
+
+    parser.add_argument('--json', required=False, action='store',
+                        help='File to write the results to as JSON')
+
+    parser.add_argument('--noisolate', required=False, action='store_true',
+                        help=('Run all cases in this process instead of '
+                              'one process per case'))
+
+    parser.add_argument('--list', required=False, action='store_true',
+                        help='List the names of the cases and exit')
+
+    parser.add_argument('cases', nargs='*',
+                        help=('Run only the cases matching these patterns '
+                              '(fnmatch style, ex: "indicator.*.runonce")'))
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    runbenchmarks()
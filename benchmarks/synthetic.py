@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import io
+import random
+
+
+STARTDATE = datetime.datetime(2000, 1, 3)
+
+
+def genbars(nbars, seed=0, startdate=STARTDATE, price=100.0, intraday=False):
+    '''
+    Generates nbars synthetic OHLCV bars as tuples (datetime, open, high,
+    low, close, volume, openinterest) following a random walk
+
+    Daily bars skip the weekends. Intraday bars are 1 minute apart
+
+    The same seed generates always the same bars, to let runs be compared
+    '''
+    rnd = random.Random(seed)
+
+    if intraday:
+        dtdelta = datetime.timedelta(minutes=1)
+    else:
+        dtdelta = datetime.timedelta(days=1)
+
+    dt = startdate
+    close = price
+    for i in range(nbars):
+        o = close * (1.0 + rnd.gauss(0.0, 0.005))
+        c = o * (1.0 + rnd.gauss(0.0, 0.01))
+        h = max(o, c) * (1.0 + abs(rnd.gauss(0.0, 0.005)))
+        l = min(o, c) * (1.0 - abs(rnd.gauss(0.0, 0.005)))
+        v = float(rnd.randint(1000, 100000))
+
+        yield dt, o, h, l, c, v, 0.0
+
+        close = c
+        dt += dtdelta
+        while not intraday and dt.weekday() > 4:
+            dt += dtdelta
+
+
+def writecsv(filename, nbars, seed=0, intraday=False):
+    '''
+    Writes nbars synthetic bars to filename in the format parsed by
+    BacktraderCSVData
+    '''
+    if intraday:
+        headers = 'Date,Time,Open,High,Low,Close,Volume,OpenInterest\n'
+        dtfmt = '%Y-%m-%d,%H:%M:%S'
+    else:
+        headers = 'Date,Open,High,Low,Close,Volume,OpenInterest\n'
+        dtfmt = '%Y-%m-%d'
+
+    with io.open(filename, 'w', newline='\n') as f:
+        f.write(headers)
+        for dt, o, h, l, c, v, oi in genbars(nbars, seed=seed,
+                                              intraday=intraday):
+            f.write('%s,%.4f,%.4f,%.4f,%.4f,%d,%d\n' %
+                    (dt.strftime(dtfmt), o, h, l, c, v, oi))
+
+    return filename
@@ -112,6 +112,7 @@ setuptools.setup(
     # $ pip install -e .[dev,test]
     extras_require={
         'plotting':  ['matplotlib'],
+        'numpy': ['numpy'],
     },
 
     # If there are data files included in your packages that need to be
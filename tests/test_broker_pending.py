@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import random
+
+import testcommon
+
+import backtrader as bt
+from backtrader import broker as btbroker
+
+
+class LinearPending(btbroker.PendingOrders):
+    # Reference: every pending order of the moved datas is checked
+    def triggerable(self, datas=None):
+        cands = list()
+        for order in self:
+            data = order.data
+            if datas is not None and not any(data is d for d in datas):
+                continue
+
+            bar = (data.open[0], data.high[0], data.low[0],
+                   data.close[0], data.close[-1])
+            cands.append((order, bar))
+            self.remove(order)
+
+        return cands
+
+
+class LinearBroker(btbroker.BrokerBack):
+    def init(self):
+        super(LinearBroker, self).init()
+        self.pending = LinearPending()
+
+
+class TestStrategy(bt.Strategy):
+    def start(self):
+        self.rnd = random.Random(13)
+        self.notifs = list()
+        self.ords = list()
+
+    def notify(self, order):
+        self.notifs.append((len(self), order.ref - self.ords[0].ref,
+                            order.status, order.executed.dt,
+                            order.executed.size, order.executed.price))
+
+    def next(self):
+        rnd = self.rnd
+        for data in self.datas:
+            for i in range(rnd.randint(0, 4)):
+                exectype = rnd.choice([bt.Order.Market, bt.Order.Close,
+                                       bt.Order.Limit, bt.Order.Stop,
+                                       bt.Order.StopLimit])
+                price = data.close[0] * rnd.uniform(0.95, 1.05)
+                valid = None
+                if rnd.random() < 0.5:
+                    valid = data.datetime[0] + rnd.choice([0, 1, 5])
+
+                action = self.buy if rnd.random() < 0.5 else self.sell
+                self.ords.append(action(data=data, size=rnd.randint(1, 5),
+                                        price=price, exectype=exectype,
+                                        valid=valid))
+
+        if self.ords and rnd.random() < 0.3:
+            self.broker.cancel(rnd.choice(self.ords))
+
+
+def runstrat(broker=None):
+    cerebro = bt.Cerebro()
+    if broker is not None:
+        cerebro.broker = broker
+
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.adddata(testcommon.getdata(1))
+    cerebro.addstrategy(TestStrategy)
+    strat = cerebro.run()[0]
+    return strat, cerebro.broker
+
+
+def test_run(main=False):
+    strat, broker = runstrat()
+    chkstrat, chkbroker = runstrat(LinearBroker())
+
+    if main:
+        print('notifications', len(strat.notifs))
+        print('pending', len(broker.pending), len(chkbroker.pending))
+
+    assert strat.notifs
+    assert strat.notifs == chkstrat.notifs
+    assert broker.getvalue() == chkbroker.getvalue()
+    assert broker.getcash() == chkbroker.getcash()
+    assert [x.ref - strat.ords[0].ref for x in broker.pending] == \
+        [x.ref - chkstrat.ords[0].ref for x in chkbroker.pending]
+
+
+if __name__ == '__main__':
+    test_run(main=True)
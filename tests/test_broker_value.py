@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import math
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        self.crosses = [btind.CrossOver(data.close, btind.SMA(data, period=p))
+                        for data, p in zip(self.datas, (15, 5))]
+
+    def start(self):
+        self.checks = 0
+
+    def next(self):
+        # cached value against the calculation over all datas
+        value = self.broker.getvalue()
+        chkvalue = self.broker.getvalue(datas=self.datas)
+        assert abs(value - chkvalue) < 1e-6
+
+        # the running sum against the sum of the values of the positions
+        broker = self.broker
+        total = math.fsum(entry[2] for entry in broker._posvalues.values())
+        assert abs(broker._posvalue + broker._posvaluec - total) < 1e-9
+        self.checks += 1
+
+        for data, cross in zip(self.datas, self.crosses):
+            if cross[0] > 0.0:
+                self.buy(data=data, size=2)
+            elif cross[0] < 0.0:
+                self.sell(data=data, size=3)
+
+
+def test_run(main=False):
+    for margin in (None, 1000.0):
+        cerebro = bt.Cerebro()
+        cerebro.broker.setcommission(commission=2.0, margin=margin, mult=10.0)
+        cerebro.adddata(testcommon.getdata(0))
+        cerebro.adddata(testcommon.getdata(1))
+        cerebro.addstrategy(TestStrategy)
+        strat = cerebro.run()[0]
+
+        if main:
+            print('margin', margin, 'value', cerebro.broker.getvalue())
+
+        assert strat.checks
+        assert cerebro.broker._posvalues
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import io
+import math
+import os
+import os.path
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class RunningMax(bt.Indicator):
+    # only next: uses the generic once implementation
+    lines = ('runmax',)
+
+    def next(self):
+        prev = self.line[-1]
+        self.line[0] = self.data[0] if math.isnan(prev) else \
+            max(prev, self.data[0])
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        self.inds = [
+            btind.SMA(self.data, period=15),
+            btind.EMA(self.data, period=30),
+            btind.Accum(self.data),
+            btind.MACDHisto(self.data),
+            btind.Stochastic(self.data),
+            btind.RSI(self.data),
+            RunningMax(self.data),
+        ]
+        self.cross = btind.CrossOver(self.data.close, self.inds[0])
+
+    def start(self):
+        self.nexts = list()
+
+    def next(self):
+        self.nexts.append((len(self), self.data.datetime[0],
+                           self.inds[1][0], self.inds[-1][0]))
+        if self.cross[0] > 0.0:
+            self.buy()
+        elif self.cross[0] < 0.0:
+            self.close()
+
+    def vals(self):
+        vals = list()
+        for ind in self.inds + [self.cross]:
+            for line in ind.lines:
+                vals.append(['%f' % x for x in line.array])
+
+        return vals
+
+
+def runstrat(datafile, runonce):
+    cerebro = bt.Cerebro(runonce=runonce)
+    cerebro.adddata(bt.feeds.BacktraderCSVData(dataname=datafile))
+    cerebro.addstrategy(TestStrategy)
+    strat = cerebro.run()[0]
+    return cerebro, strat
+
+
+def test_run(main=False):
+    datafile = testcommon.getdata(0).p.dataname
+    with io.open(datafile, 'rb') as f:
+        lines = f.readlines()
+
+    fd, partfile = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+
+    try:
+        for runonce in (True, False):
+            _, chkstrat = runstrat(datafile, runonce)
+
+            # first part of the file, then the rest of the bars appended
+            with io.open(partfile, 'wb') as f:
+                f.writelines(lines[:200])
+
+            cerebro, strat = runstrat(partfile, runonce)
+            nexts = len(strat.nexts)
+
+            with io.open(partfile, 'ab') as f:
+                f.writelines(lines[200:])
+
+            cerebro.update()
+            if main:
+                print('nexts before update %d after %d' %
+                      (nexts, len(strat.nexts)))
+
+            assert len(strat) == len(chkstrat)
+            assert strat.nexts == chkstrat.nexts
+            assert strat.vals() == chkstrat.vals()
+            assert cerebro.broker.getvalue() == chkstrat.broker.getvalue()
+
+            # nothing new: nothing happens
+            cerebro.update()
+            assert strat.nexts == chkstrat.nexts
+    finally:
+        os.remove(partfile)
+
+
+def test_run_reversed(main=False):
+    # newest bars first: the update adds them at the top of the file
+    datafile = os.path.join(testcommon.modpath,
+                            '../samples/datas/yahoo/yhoo-2014.txt')
+    with io.open(datafile, 'rb') as f:
+        header = f.readline()
+        lines = f.readlines()
+
+    lines.reverse()
+    fd, partfile = tempfile.mkstemp(suffix='.txt')
+    os.close(fd)
+
+    try:
+        with io.open(partfile, 'wb') as f:
+            f.writelines([header] + lines[100:])
+
+        cerebro = bt.Cerebro()
+        data = bt.feeds.YahooFinanceCSVData(dataname=partfile, reverse=True)
+        cerebro.adddata(data)
+        cerebro.addstrategy(bt.Strategy)
+        cerebro.run()
+        assert len(data) == len(lines) - 100
+
+        with io.open(partfile, 'wb') as f:
+            f.writelines([header] + lines)
+
+        cerebro.update()
+        if main:
+            print('bars after update %d' % len(data))
+
+        assert len(data) == len(lines)
+        closes = [float(line.split(b',')[4]) for line in reversed(lines)]
+        assert list(data.close.array) == closes
+    finally:
+        os.remove(partfile)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_run_reversed(main=True)
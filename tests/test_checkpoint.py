@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import os.path
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class Crash(Exception):
+    pass
+
+
+class TestStrategy(bt.Strategy):
+    params = (('crashat', None),)
+
+    def __init__(self):
+        self.sma = btind.SMA(self.data0, period=15)
+        self.cross = btind.CrossOver(self.data0.close, self.sma)
+        self.smaw = btind.SMA(self.data1, period=5)
+
+    def next(self):
+        if len(self) == self.p.crashat:
+            raise Crash()
+
+        if self.cross[0] > 0.0:
+            self.buy()
+            # a limit order which stays pending for a while
+            self.sell(price=self.data0.close[0] * 1.05,
+                      exectype=bt.Order.Limit)
+        elif self.cross[0] < 0.0:
+            self.close()
+
+    def vals(self):
+        return (self.broker.getvalue(), self.broker.getcash(),
+                len(self), len(self.broker.orders), len(self.broker.pending),
+                ['%f' % x for x in self.sma.array],
+                ['%f' % x for x in self.smaw.array],
+                ['%f' % x for x in self.analyzer.cashvalue.lines.value.array],
+                self.analyzer.cashvalue.maxdrawdown)
+
+
+def runstrat(checkpoint, preload, crashat=None, resume=False):
+    cerebro = bt.Cerebro(preload=preload, runonce=False,
+                         checkpoint=checkpoint, checkpointbars=50)
+    for i in range(2):
+        cerebro.adddata(testcommon.getdata(i))
+
+    cerebro.addstrategy(TestStrategy, crashat=crashat)
+    if resume:
+        return cerebro.resume()[0]
+
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    fd, checkpoint = tempfile.mkstemp(suffix='.ckpt')
+    os.close(fd)
+    os.remove(checkpoint)
+
+    try:
+        for preload in (False, True):
+            chkvals = runstrat(None, preload).vals()
+
+            try:
+                runstrat(checkpoint, preload, crashat=180)
+            except Crash:
+                pass
+            else:
+                assert False, 'the run should have crashed'
+
+            assert os.path.exists(checkpoint)
+            strat = runstrat(checkpoint, preload, resume=True)
+            if main:
+                print('value %f cash %f len %d orders %d pending %d' %
+                      strat.vals()[:5])
+
+            assert strat.vals() == chkvals
+            os.remove(checkpoint)
+    finally:
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
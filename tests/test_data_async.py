@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import io
+import os.path
+import socketserver
+import threading
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class CSVHandler(socketserver.StreamRequestHandler):
+    # Stand-in for a live source: streams the bars of a csv file
+    def handle(self):
+        with io.open(self.server.filename, 'rb') as f:
+            f.readline()  # skip the headers
+            for line in f:
+                self.wfile.write(line)
+
+
+class CSVServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+
+    def __init__(self, filename):
+        socketserver.TCPServer.__init__(self, ('localhost', 0), CSVHandler)
+        self.filename = filename
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma0 = btind.SMA(self.data0, period=5)
+        self.sma1 = btind.SMA(self.data1, period=15)
+
+    def start(self):
+        self.nexts = list()
+
+    def next(self):
+        self.nexts.append((len(self.data0), len(self.data1),
+                           self.sma0[0], self.sma1[0]))
+
+
+def runstrat(datas):
+    cerebro = bt.Cerebro(preload=False, runonce=False)
+    for data in datas:
+        cerebro.adddata(data)
+
+    cerebro.addstrategy(TestStrategy)
+    return cerebro, cerebro.run()[0]
+
+
+def test_run(main=False):
+    chkdatas = [testcommon.getdata(i) for i in range(2)]
+    _, chkstrat = runstrat(chkdatas)
+
+    servers = list()
+    try:
+        datas = list()
+        for chkdata in chkdatas:
+            server = CSVServer(chkdata.p.dataname)
+            servers.append(server)
+            datas.append(bt.feeds.SocketData(port=server.server_address[1],
+                                             fromdate=chkdata.p.fromdate,
+                                             todate=chkdata.p.todate))
+
+        cerebro, strat = runstrat(datas)
+    finally:
+        for server in servers:
+            server.close()
+
+    if main:
+        print('nexts', len(strat.nexts))
+        print('max latency', max(cerebro.latencies))
+
+    assert strat.nexts == chkstrat.nexts
+    # one set of bars per datetime: the weekly data has a bar on a day which
+    # the daily data lacks
+    assert len(cerebro.latencies) == len(datas[0]) + 1
+
+
+if __name__ == '__main__':
+    test_run(main=True)
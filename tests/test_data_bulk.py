@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import io
+import os
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+MINFILE = '2006-min-005.txt'
+
+
+def loadvalues(dataname, bulk, **kwargs):
+    data = bt.feeds.BacktraderCSVData(dataname=dataname, **kwargs)
+    if not bulk:
+        data._preloadbulk = lambda: False
+
+    data.start()
+    data.preload()
+    data.stop()
+    # NaN (not in these files) would not compare equal
+    return [list(line.array) for line in data.lines]
+
+
+def test_run(main=False):
+    datafiles = testcommon.datafiles + [MINFILE]
+    filters = [
+        dict(),
+        dict(fromdate=datetime.datetime(2006, 3, 1),
+             todate=datetime.datetime(2006, 9, 1)),
+        dict(todate=datetime.datetime(2006, 1, 1)),  # nothing at all
+    ]
+
+    for datafile in datafiles:
+        dataname = os.path.join(testcommon.modpath, testcommon.dataspath,
+                                datafile)
+        for kwargs in filters:
+            values = loadvalues(dataname, True, **kwargs)
+            chkvalues = loadvalues(dataname, False, **kwargs)
+
+            if main:
+                print(datafile, kwargs, len(values[0]))
+
+            assert values == chkvalues
+
+    # a line which numpy cannot parse: the lines are parsed one by one
+    dataname = os.path.join(testcommon.modpath, testcommon.dataspath,
+                            testcommon.datafiles[0])
+    with io.open(dataname, 'rb') as f:
+        lines = f.readlines()
+
+    chkvalues = loadvalues(io.BytesIO(b''.join(lines)), True, name='ok')
+    lines[5] = lines[5].replace(b'-', b'/')
+    values = loadvalues(io.BytesIO(b''.join(lines)), True, name='slashes')
+    assert values == chkvalues
+
+
+if __name__ == '__main__':
+    test_run(main=True)
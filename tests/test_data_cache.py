@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import glob
+import io
+import os
+import shutil
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+
+
+def noparse(*args, **kwargs):
+    raise AssertionError('file parsed instead of read from the cache')
+
+
+def preload(dataname, cached=False, **kwargs):
+    data = bt.feeds.BacktraderCSVData(dataname=dataname, cache=True, **kwargs)
+    if cached:
+        data._preloadbulk = data._load = noparse
+
+    data.start()
+    data.preload()
+    values = [list(line.array) for line in data.lines]
+    return data, values
+
+
+def test_run(main=False):
+    srcfile = testcommon.getdata(0).p.dataname
+    with io.open(srcfile, 'rb') as f:
+        lines = f.readlines()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        dataname = os.path.join(tmpdir, 'data.txt')
+        with io.open(dataname, 'wb') as f:
+            f.writelines(lines[:200])
+
+        # parsed and cached, then read from the cache
+        data, chkvalues = preload(dataname)
+        data.stop()
+        cachefiles = glob.glob(dataname + '.*.btcache')
+        assert len(cachefiles) == 1
+
+        data, values = preload(dataname, True)
+        data.stop()
+        assert values == chkvalues
+
+        # other params: another cache
+        fromdate = datetime.datetime(2006, 6, 1)
+        data, values = preload(dataname,
+                               fromdate=fromdate)
+        data.stop()
+        assert len(values[0]) < len(chkvalues[0])
+        assert len(glob.glob(dataname + '.*.btcache')) == 2
+
+        data, cvalues = preload(dataname, True, fromdate=fromdate)
+        data.stop()
+        assert cvalues == values
+
+        # a changed file is parsed again
+        with io.open(dataname, 'ab') as f:
+            f.writelines(lines[200:])
+
+        os.utime(dataname, (0, 0))  # the mtime may not change in 1 sec
+        data, values = preload(dataname)
+        data.stop()
+        assert len(values[0]) == len(lines) - 1
+
+        # loading from the cache leaves the file where the parsing did
+        with io.open(dataname, 'wb') as f:
+            f.writelines(lines[:200])
+
+        data, values = preload(dataname)
+        data.stop()
+        data, values = preload(dataname, True)
+        data.stop()
+        with io.open(dataname, 'ab') as f:
+            f.writelines(lines[200:])
+
+        del data._load  # parsing allowed again
+        assert data.preloadmore() == len(lines) - 200
+
+        # a damaged cache is ignored and the file parsed
+        for cachefile in glob.glob(dataname + '.*.btcache'):
+            with io.open(cachefile, 'wb') as f:
+                f.write(b'{"key": 1}\n\x80\x04garbage')
+
+        data, values = preload(dataname)
+        data.stop()
+        assert len(values[0]) == len(lines) - 1
+
+        # a cache which cannot be written leaves no temporary file behind
+        for cachefile in glob.glob(dataname + '.*.btcache'):
+            os.remove(cachefile)
+            os.mkdir(cachefile)
+
+        data, values = preload(dataname)
+        data.stop()
+        assert len(values[0]) == len(lines) - 1
+        assert not glob.glob(os.path.join(tmpdir, '*.tmp'))
+
+        if main:
+            print('cache files', sorted(os.listdir(tmpdir)))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    params = (('main', False),)
+
+    def __init__(self):
+        self.sma = btind.SMA(self.data1, period=5)
+
+    def start(self):
+        self.nexts = 0
+        self.lastdt = 0.0
+
+    def next(self):
+        self.nexts += 1
+        # every call sees a new bar in at least one of the datas
+        dt = max(self.data0.datetime[0], self.data1.datetime[0])
+        assert dt > self.lastdt
+        self.lastdt = dt
+        if self.p.main:
+            print(len(self), self.data0.datetime.date(0),
+                  self.data1.datetime.date(0), self.sma[0])
+
+
+def test_run(main=False):
+    # The weekly data is the 1st data. The bars of the daily data in between
+    # the weekly bars must be delivered and not skipped
+    for runonce, preload in ((True, True), (False, True), (False, False)):
+        cerebro = bt.Cerebro(runonce=runonce, preload=preload)
+        data0 = testcommon.getdata(1)
+        data1 = testcommon.getdata(0)
+        cerebro.adddata(data0)
+        cerebro.adddata(data1)
+        cerebro.addstrategy(TestStrategy, main=main)
+        strat = cerebro.run()[0]
+
+        assert len(data0) == 52
+        assert len(data1) == 255
+        assert len(strat) == len(data0)
+        assert len(strat.sma) == len(data1)
+        # next is called on every datetime from the 5th weekly bar on (the
+        # period of the SMA), before which there are 24 daily bars. The
+        # weekly data has a bar (2006-04-14) which the daily data lacks
+        assert strat.nexts == 255 + 1 - 24
+
+
+class OrderStrategy(bt.Strategy):
+    def start(self):
+        self.order = None
+        self.created = None
+
+    def notify(self, order):
+        if order.status == order.Completed:
+            self.executed = (len(self.data0), order.executed.price)
+
+    def next(self):
+        # buy the weekly data at its 4th bar. The daily bars in between must
+        # not execute it with the bar in which it was created
+        if self.order is None and len(self.data0) == 4:
+            self.order = self.buy(data=self.data0, size=1)
+            self.created = len(self.data0)
+
+
+def test_run_orders(main=False):
+    for runonce, preload in ((True, True), (False, True), (False, False)):
+        for margin in (None, 1000.0):
+            cerebro = bt.Cerebro(runonce=runonce, preload=preload)
+            cerebro.broker.setcommission(margin=margin, mult=10.0)
+            data0 = testcommon.getdata(1)
+            data1 = testcommon.getdata(0)
+            cerebro.adddata(data0)
+            cerebro.adddata(data1)
+            cerebro.addstrategy(OrderStrategy)
+            strat = cerebro.run()[0]
+
+            # executed at the open of the next weekly bar
+            execlen, execprice = strat.executed
+            assert execlen == strat.created + 1
+            assert execprice == data0.open[-len(data0) + execlen]
+
+            # the cash of futures is adjusted once per weekly bar: the value
+            # is the profit of the position
+            value = cerebro.broker.getvalue()
+            profit = (data0.close[0] - execprice) * (margin and 10.0 or 1.0)
+            if main:
+                print(runonce, preload, margin, strat.executed, value)
+
+            assert abs(value - (cerebro.broker.startingcash + profit)) < 1e-6
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_run_orders(main=True)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import datetime
+import os
+import os.path
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import testcommon
+
+import backtrader as bt
+
+FROMDATE = datetime.datetime(2006, 3, 1)
+TODATE = datetime.datetime(2006, 9, 1)
+
+
+class RunStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = bt.indicators.SMA(self.data, period=15)
+        self.values = list()
+
+    def next(self):
+        self.values.append((self.data.datetime[0], self.data.close[0],
+                            self.sma[0]))
+
+
+def runvalues(data, **kwargs):
+    cerebro = bt.Cerebro(**kwargs)
+    cerebro.adddata(data)
+    cerebro.addstrategy(RunStrategy)
+    return cerebro.run()[0].values
+
+
+def loadvalues(data):
+    data.start()
+    data.preload()
+    data.stop()
+    return [list(line.array) for line in data.lines]
+
+
+def test_run(main=False):
+    srcfile = os.path.join(testcommon.modpath, testcommon.dataspath,
+                           testcommon.datafiles[0])
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        dataname = os.path.join(tmpdir, 'data.btcols')
+        toolpath = os.path.join(testcommon.modpath, '..', 'tools',
+                                'csv2mmap.py')
+        env = dict(os.environ, PYTHONPATH=os.path.join(testcommon.modpath,
+                                                       '..'))
+        subprocess.check_call([sys.executable, toolpath, '--infile', srcfile,
+                               '--outfile', dataname], env=env)
+
+        for kwargs in [dict(), dict(fromdate=FROMDATE, todate=TODATE)]:
+            data = bt.feeds.MMapData(dataname=dataname, **kwargs)
+            values = loadvalues(data)
+            chkvalues = loadvalues(
+                bt.feeds.BacktraderCSVData(dataname=srcfile, **kwargs))
+            assert values == chkvalues
+
+            # the lines are views on the file and not copies
+            assert isinstance(data.close.array, memoryview)
+            pickle.dumps(data.close.savestate())
+
+            # the positions reserved for lookahead are kept
+            data = bt.feeds.MMapData(dataname=dataname, **kwargs)
+            data.extend(size=2)
+            values = loadvalues(data)
+            assert [line[:-2] for line in values] == chkvalues
+            assert all(x != x for line in values for x in line[-2:])  # NaN
+            assert data.buflen() == len(chkvalues[0])
+
+            for runkw in [dict(), dict(runonce=False),
+                          dict(preload=False, runonce=False),
+                          dict(lookahead=2)]:
+                values = runvalues(
+                    bt.feeds.MMapData(dataname=dataname, **kwargs), **runkw)
+                chkvalues = runvalues(
+                    bt.feeds.BacktraderCSVData(dataname=srcfile, **kwargs),
+                    **runkw)
+
+                if main:
+                    print(kwargs, runkw, len(values))
+
+                assert values == chkvalues
+
+        # the datetime values cannot go backwards
+        try:
+            bt.feeds.writecolumns(dataname, ['datetime'], [[2.0, 1.0]])
+        except ValueError:
+            pass
+        else:
+            assert False
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    params = (('period', 15), ('threshold', 0.0),)
+
+    def __init__(self):
+        self.sma = btind.SMA(self.data, period=self.p.period)
+        self.stoch = btind.Stochastic(self.data)
+        self.diff = self.data.close - self.sma
+
+    def stop(self):
+        self.vals = ['%f' % x for x in self.sma.array] + \
+            ['%f' % x for x in self.stoch.lines.percD.array] + \
+            ['%f' % x for x in self.diff.array]
+
+
+def runopt(indcache):
+    cerebro = bt.Cerebro(indcache=indcache)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.optstrategy(TestStrategy, period=[15, 30], threshold=[0.0, 1.0])
+    results = cerebro.run()
+    return cerebro, [stratlist[0].vals for stratlist in results]
+
+
+def test_run(main=False):
+    _, chkvals = runopt(indcache=0)
+    cerebro, vals = runopt(indcache=64 * 1024 * 1024)
+
+    assert vals == chkvals
+
+    # 4 combinations x 2 top indicators: the SMA is calculated only by the
+    # 1st combination with each period and the Stochastic only by the 1st
+    # combination. Reusing the values skips the sub-indicators
+    indcache = cerebro._indcache
+    if main:
+        print('hits %d misses %d' % (indcache.hits, indcache.misses))
+    else:
+        assert indcache.hits == 5
+
+    # a cache too small to hold a single indicator is never filled
+    cerebro, vals = runopt(indcache=1)
+    assert vals == chkvals
+    assert not len(cerebro._indcache)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
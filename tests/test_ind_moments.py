@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class SMA(btind.SMA):
+    # not the default movav: the indicators are composed of other ones
+    pass
+
+
+class RunStrategy(bt.Strategy):
+    params = (('period', 1),)
+
+    def __init__(self):
+        period = self.p.period
+        close = self.data.close
+        self.pairs = [
+            (btind.StdDev(close, period=period),
+             btind.StdDev(close, btind.SMA(close, period=period),
+                          period=period)),
+            (btind.MeanDev(close, period=period),
+             btind.MeanDev(close, btind.SMA(close, period=period),
+                           period=period)),
+            (btind.BBands(close, period=period),
+             btind.BBands(close, period=period, movav=SMA)),
+            # the whole data (its other lines are added as datas) or none
+            (btind.StdDev(self.data, period=period),
+             btind.StdDev(close, btind.SMA(close, period=period),
+                          period=period)),
+            (btind.MeanDev(period=period),
+             btind.MeanDev(close, btind.SMA(close, period=period),
+                           period=period)),
+        ]
+
+    def stop(self):
+        self.values = [
+            [(list(ind.lines[i].array), list(chkind.lines[i].array))
+             for i in range(ind.size())]
+            for ind, chkind in self.pairs
+        ]
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        for period in [2, 20, 60]:
+            cerebro = bt.Cerebro(runonce=runonce)
+            cerebro.adddata(testcommon.getdata(0))
+            cerebro.addstrategy(RunStrategy, period=period)
+            strat = cerebro.run()[0]
+
+            for (ind, chkind), lines in zip(strat.pairs, strat.values):
+                assert ind._minperiod == chkind._minperiod
+
+                for values, chkvalues in lines:
+                    assert len(values) == len(chkvalues)
+                    maxerr = 0.0
+                    for value, chkvalue in zip(values[ind._minperiod - 1:],
+                                               chkvalues[ind._minperiod - 1:]):
+                        # the composed ones lose precision with the squares
+                        assert abs(value - chkvalue) <= 1e-6
+                        maxerr = max(maxerr, abs(value - chkvalue))
+
+                if main:
+                    print(runonce, period, ind.__class__.__name__, maxerr)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import io
+import random
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+INDICATORS = [
+    btind.Highest, btind.Lowest,
+    btind.FindFirstIndexHighest, btind.FindFirstIndexLowest,
+    btind.FindLastIndexHighest, btind.FindLastIndexLowest,
+]
+
+
+def reference(indcls):
+    # func evaluated over the whole period for each bar
+    class Reference(indcls):
+        def __init__(self):
+            super(Reference, self).__init__()
+            self._dqdrop = None
+
+    return Reference
+
+
+class RunStrategy(bt.Strategy):
+    params = (('period', 1), ('indicators', INDICATORS),)
+
+    def __init__(self):
+        self.inds = [(indcls(self.data, period=self.p.period),
+                      reference(indcls)(self.data, period=self.p.period))
+                     for indcls in self.p.indicators]
+
+    def stop(self):
+        self.values = [
+            (list(ind.array[self.p.period - 1:]),
+             list(ref.array[self.p.period - 1:]))
+            for ind, ref in self.inds
+        ]
+
+
+def getdata(nans=False):
+    # few different prices: plenty of equal values in each period
+    rnd = random.Random(5)
+    lines = list()
+    for i in range(300):
+        price = str(rnd.randrange(10))
+        if nans and not rnd.randrange(8):
+            price = 'nan'
+
+        lines.append('2006-01-01,10:%02d:%02d,%s,%s,%s,%s,0,0\n' %
+                     (i // 60, i % 60, price, price, price, price))
+
+    return bt.feeds.BacktraderCSVData(
+        dataname=io.BytesIO(''.join(lines).encode('ascii')), name='ties',
+        headers=False)
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        for period in [1, 2, 7, 30]:
+            cerebro = bt.Cerebro(runonce=runonce)
+            cerebro.adddata(getdata())
+            cerebro.addstrategy(RunStrategy, period=period)
+            strat = cerebro.run()[0]
+
+            for indcls, (values, chkvalues) in zip(INDICATORS, strat.values):
+                if main:
+                    print(runonce, period, indcls.__name__, values[-5:])
+
+                assert values == chkvalues
+
+
+def samevalues(values, chkvalues):
+    return all(x == y or (x != x and y != y)
+               for x, y in zip(values, chkvalues))
+
+
+def test_run_nan(main=False):
+    # max/min results depend on where the NaN values are in the period
+    indicators = [btind.Highest, btind.Lowest]
+    for runonce in [True, False]:
+        for period in [1, 2, 7, 30]:
+            cerebro = bt.Cerebro(runonce=runonce)
+            cerebro.adddata(getdata(nans=True))
+            cerebro.addstrategy(RunStrategy, period=period,
+                                indicators=indicators)
+            strat = cerebro.run()[0]
+
+            for indcls, (values, chkvalues) in zip(indicators, strat.values):
+                if main:
+                    print(runonce, period, indcls.__name__, values[-5:])
+
+                assert len(values) == len(chkvalues)
+                assert samevalues(values, chkvalues)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_run_nan(main=True)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import io
+import math
+import operator
+import random
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class RunStrategy(bt.Strategy):
+    params = (('period', 1),)
+
+    def __init__(self):
+        self.sumn = btind.SumN(self.data, period=self.p.period)
+        self.sma = btind.SMA(self.data, period=self.p.period)
+        period = self.p.period
+        self.weights = [
+            [float(k) for k in range(1, period + 1)],  # WMA
+            [3.0 - 0.5 * k for k in range(1, period + 1)],  # other linear
+            [float(k * k) for k in range(1, period + 1)],  # not linear
+        ]
+        self.wavs = [btind.AverageWeighted(self.data, period=period,
+                                           weights=weights)
+                     for weights in self.weights]
+        # default weights (linear) and coef: the weighted moving average
+        self.wma = btind.AverageWeighted(self.data, period=period)
+
+
+def getdata(nbars, price):
+    # large prices with small changes: the worst case for a running sum
+    rnd = random.Random(3)
+    lines = list()
+    for i in range(nbars):
+        price += rnd.uniform(-1.0, 1.0) + 1e-7 * rnd.random()
+        lines.append('2006-01-01,%02d:%02d:%02d,%r,%r,%r,%r,0,0\n' %
+                     (i // 3600, i // 60 % 60, i % 60,
+                      price, price, price, price))
+
+    return bt.feeds.BacktraderCSVData(
+        dataname=io.BytesIO(''.join(lines).encode('ascii')), name='sums',
+        headers=False)
+
+
+def test_run(main=False):
+    for runonce in [True, False]:
+        for period in [1, 3, 30, 200]:
+            cerebro = bt.Cerebro(runonce=runonce)
+            cerebro.adddata(getdata(1000, 1e6))
+            cerebro.addstrategy(RunStrategy, period=period)
+            strat = cerebro.run()[0]
+
+            src = strat.data.close.array
+            maxerr = 0.0
+            for i in range(period - 1, len(src)):
+                chksum = math.fsum(src[i - period + 1:i + 1])
+                assert strat.sumn.array[i] == chksum or \
+                    abs(strat.sumn.array[i] - chksum) <= 1e-12 * chksum
+                assert abs(strat.sma.array[i] - chksum / period) <= \
+                    1e-12 * chksum / period
+
+                maxerr = max(maxerr, abs(strat.sumn.array[i] - chksum))
+
+                window = src[i - period + 1:i + 1]
+                for weights, wav in zip(strat.weights, strat.wavs):
+                    chkwsum = math.fsum(map(operator.mul, window, weights))
+                    assert abs(wav.array[i] - chkwsum) <= \
+                        1e-12 * math.fsum(map(abs, weights)) * window[-1]
+
+                chkwma = strat.wavs[0].array[i] * 2.0 / (period * (period + 1))
+                assert abs(strat.wma.array[i] - chkwma) <= 1e-12 * window[-1]
+
+            if main:
+                print(runonce, period, 'max abs error', maxerr)
+
+
+if __name__ == '__main__':
+    test_run(main=True)
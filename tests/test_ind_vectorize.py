@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import glob
+import importlib
+import os.path
+
+import testcommon
+
+import backtrader as bt
+
+
+def test_run(main=False):
+    # Run the checks of all indicator tests with vectorized "once" methods
+    # (if numpy is not available the regular methods run)
+    pattern = os.path.join(testcommon.modpath, 'test_ind_*.py')
+    for testfile in sorted(glob.glob(pattern)):
+        modname = os.path.splitext(os.path.basename(testfile))[0]
+        if modname == __name__:
+            continue
+
+        mod = importlib.import_module(modname)
+        if not hasattr(mod, 'chkvals'):
+            continue  # not a regular indicator check
+
+        if main:
+            print('checking', modname)
+
+        datas = [testcommon.getdata(i) for i in range(mod.chkdatas)]
+        testcommon.runtest(datas,
+                           getattr(mod, 'TS2', testcommon.TestStrategy),
+                           vectorize=True,
+                           chkind=mod.chkind,
+                           chkmin=mod.chkmin,
+                           chkvals=mod.chkvals,
+                           chkargs=getattr(mod, 'chkargs', dict()))
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import threading
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+from backtrader import metabase
+
+
+class SubIndicator(bt.Indicator):
+    lines = ('sub',)
+
+    def __init__(self):
+        self.sma = btind.SMA(self.data, period=5)
+        self.l.sub = self.data - self.sma
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = btind.SMA(self.data, period=15)
+        self.diff = self.data.close - self.sma
+        self.delay = self.data(-1)
+        self.subind = SubIndicator()
+
+
+def checkowners(strat):
+    assert strat._owner is None
+    assert strat.sma._owner is strat
+    assert strat.diff._owner is strat
+    assert strat.delay._owner is strat
+    assert strat.subind._owner is strat
+    assert strat.subind.sma._owner is strat.subind
+    assert strat.subind.l.sub._owner is strat.subind
+    for observer in strat._lineiterators[bt.LineIterator.ObsType]:
+        assert observer._owner is strat
+
+
+def test_run(main=False):
+    strats = list()
+
+    def buildstrat():
+        cerebro = bt.Cerebro()
+        strats.append(TestStrategy(cerebro, testcommon.getdata(0)))
+
+    threads = [threading.Thread(target=buildstrat) for i in range(4)]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    buildstrat()
+
+    assert len(strats) == len(threads) + 1
+    for strat in strats:
+        checkowners(strat)
+
+    # Nothing remains as owner after the constructions
+    assert not metabase._owners.stack
+
+
+if __name__ == '__main__':
+    test_run(main=True)
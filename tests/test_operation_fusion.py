@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import collections
+import math
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        d = self.data
+        self.kama = btind.KAMA(d)
+        self.adx = btind.ADX(d)
+        # 8 operations fused into 1 (the delay is an input)
+        self.expr = abs(d.close / d.open - 1.0) * 100.0 > \
+            (d.high - d.low) ** 0.5 + d.close(-2)
+        # also consumed by expr2: kept
+        self.diff = d.close - d.open
+        self.expr2 = 2.0 - self.diff / self.diff(-1)
+
+
+def runstrat(fuse, **kwargs):
+    cerebro = bt.Cerebro(fuse=fuse, **kwargs)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(TestStrategy)
+    strat = cerebro.run()[0]
+
+    lines = [strat.expr, strat.diff, strat.expr2]
+    lines.extend(strat.kama.lines)
+    lines.extend(strat.adx.lines)
+    return strat, [list(line.array) for line in lines]
+
+
+def equal(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+def test_run(main=False):
+    for kwargs in (dict(), dict(runonce=False), dict(vectorize=True)):
+        unfused, expected = runstrat(False, **kwargs)
+        fused, values = runstrat(True, **kwargs)
+        default, dvalues = runstrat(None, **kwargs)
+        if main:
+            print(kwargs, len(unfused.getindicators()),
+                  len(fused.getindicators()))
+
+        for evalues, fvalues, dvalues in zip(expected, values, dvalues):
+            assert len(evalues) == len(fvalues) == len(dvalues)
+            assert all(equal(e, f) for e, f in zip(evalues, fvalues))
+            assert all(equal(e, d) for e, d in zip(evalues, dvalues))
+
+        # kama, adx, close(-2), expr, diff, diff(-1) and expr2
+        actions = fused.getindicators()
+        assert len(actions) == 7
+        assert any(x is fused.expr for x in actions)
+        assert any(x is fused.diff for x in actions)
+        assert len(unfused.getindicators()) == 15
+
+        # by default only the operations inside the indicators
+        assert len(default.getindicators()) == 15
+        assert len(default.kama.getindicators()) == 6
+        assert len(unfused.kama.getindicators()) == 12
+
+
+class HolderStrategy(bt.Strategy):
+    # operations only read in next, held in a closure and a deque. The inner
+    # ones are also consumed by other operations
+    def __init__(self):
+        d = self.data
+        diff = (d.close - d.open) * 2.0
+        inner = d.close - d.open
+        self.get = lambda: (diff[0], inner[0])
+        self.x = inner * 2.0
+        rng = d.high - d.low
+        self.held = collections.deque([abs(rng) / 2.0, rng])
+        self.y = rng + 1.0
+        self.values = list()
+
+    def next(self):
+        self.values.append(self.get() + (self.held[0][0], self.held[1][0]))
+
+
+def test_run_held(main=False):
+    for kwargs in (dict(), dict(runonce=False), dict(profile=True),
+                   dict(savemem=True), dict(vectorize=True)):
+        kwargs['fuse'] = True
+        cerebro = bt.Cerebro(**kwargs)
+        data = testcommon.getdata(0)
+        cerebro.adddata(data)
+        cerebro.addstrategy(HolderStrategy)
+        strat = cerebro.run()[0]
+        if main:
+            print(kwargs, strat.values[-1])
+
+        assert len(strat.values) == len(data)
+        inner = data.close[0] - data.open[0]
+        rng = data.high[0] - data.low[0]
+        assert strat.values[-1] == (inner * 2.0, inner, abs(rng) / 2.0, rng)
+
+        # only the operations consumed by diff and held[0] are inlined
+        assert len(strat.getindicators()) == 6
+
+
+if __name__ == '__main__':
+    test_run(main=True)
+    test_run_held(main=True)
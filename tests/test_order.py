@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+from backtrader import order as btorder
+
+
+def test_run(main=False):
+    data = testcommon.getdata(0)
+    data.start()
+    data.preload()
+    data.home()
+    data.advance()
+
+    order = btorder.SellOrder(owner=None, data=data, size=10, price=12.5,
+                              exectype=bt.Order.Limit)
+
+    # compact records: no per instance dict
+    for obj in (order, order.created, order.executed):
+        assert not hasattr(obj, '__dict__')
+
+    assert order.size == -10
+    assert order.params is order and order.p is order
+    assert order.created.price == order.created.pricelimit == 12.5
+    assert order.triggered
+    assert not btorder.StopLimitSellOrder(data=data, size=1).triggered
+
+    order.accept()
+    order.execute(data.datetime[0], -4, 12.5, 0, 0.0, 0.0,
+                  -4, 50.0, 0.0, None, -4, 12.5)
+    order.execute(data.datetime[0], -6, 13.5, 0, 0.0, 0.0,
+                  -6, 81.0, 0.0, None, -10, 13.1)
+
+    if main:
+        print('executed size/price/value', order.executed.size,
+              order.executed.price, order.executed.value)
+
+    assert order.status == bt.Order.Completed
+    assert len(order.executed) == 2
+    assert order.executed.size == -10
+    assert order.executed.price == (4 * 12.5 + 6 * 13.5) / 10
+    assert order.executed.value == 131.0
+    assert order.executed.psize == -10
+
+    data.stop()
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    def __init__(self):
+        self.sma = btind.SMA(self.data, period=15)
+        self.diff = self.data.close - self.sma
+
+
+def runprofile(runonce):
+    cerebro = bt.Cerebro(runonce=runonce, profile=True)
+    data = testcommon.getdata(0)
+    cerebro.adddata(data)
+    cerebro.addstrategy(TestStrategy)
+    strat = cerebro.run()[0]
+    return data, strat.profile
+
+
+def test_run(main=False):
+    for runonce in (True, False):
+        data, profile = runprofile(runonce)
+        if main:
+            print(profile.report())
+
+        names = [node.name for node in profile.children]
+        assert profile.name == 'TestStrategy'
+        assert 'SMA' in names
+        assert 'LinesOperation(sub)' in names
+
+        sma = profile.children[names.index('SMA')]
+        if runonce:
+            # strategy: 1 _once + 1 _oncepost per bar
+            assert profile.calls == data.buflen() + 1
+            assert sma.calls == 1
+        else:
+            assert profile.calls == data.buflen()
+            assert sma.calls == data.buflen()
+
+        for depth, node in profile.walk():
+            assert node.selftime > -1e-6
+
+
+if __name__ == '__main__':
+    test_run(main=True)
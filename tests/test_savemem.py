@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import testcommon
+
+import backtrader as bt
+import backtrader.indicators as btind
+
+
+class TestStrategy(bt.Strategy):
+    params = (('keep', 0),)
+
+    def __init__(self):
+        self.sma = btind.SMA(self.data, period=5)
+        self.above = self.data.close > self.sma
+        if self.p.keep:
+            self.data.close.minbuffer(self.p.keep)
+
+        self.values = list()
+
+    def next(self):
+        if len(self) > 20:
+            self.values.append((self.data.close[-8], self.above[0]))
+
+
+def runstrat(savemem, keep=0):
+    cerebro = bt.Cerebro(savemem=savemem)
+    cerebro.adddata(testcommon.getdata(0))
+    cerebro.addstrategy(TestStrategy, keep=keep)
+    return cerebro.run()[0]
+
+
+def test_run(main=False):
+    expected = runstrat(savemem=False).values
+
+    strat = runstrat(savemem=True, keep=9)
+    if main:
+        print(expected[:5])
+        print(strat.values[:5])
+
+    assert strat.values == expected
+    for close, above in strat.values:
+        assert type(above) is float
+
+    # [-8] is beyond the minimum period and no room was made for it
+    try:
+        runstrat(savemem=True)
+    except IndexError:
+        pass
+    else:
+        assert False, 'dropped values must not be readable'
+
+
+if __name__ == '__main__':
+    test_run(main=True)
@@ -82,11 +82,11 @@ class TestStrategy(bt.Strategy):
             self.log('-------------------------')
             self.log('Starting portfolio value: %.2f' % self.broker.getvalue())
 
-        self.tstart = time.clock()
+        self.tstart = time.time()
         self.buy_create_idx = itertools.count()
 
     def stop(self):
-        tused = time.clock() - self.tstart
+        tused = time.time() - self.tstart
         if self.p.printdata:
             self.log('Time used: %s' % str(tused))
             self.log('Final portfolio value: %.2f' % self.broker.getvalue())
@@ -133,5 +133,104 @@ def test_run(main=False):
         print(_chkcash)
 
 
+def test_run_maxcpus(main=False):
+    datas = [testcommon.getdata(i) for i in range(chkdatas)]
+    results = testcommon.runtest(datas,
+                                 TestStrategy,
+                                 optimize=True,
+                                 maxcpus=2,
+                                 period=xrange(5, 45),
+                                 printdata=main,
+                                 printops=main,
+                                 plot=False)
+
+    # Worker processes return the results in submission order
+    periods = [optrets[0].params['period'] for optrets in results]
+    values = ['%.2f' % optrets[0].value for optrets in results]
+    cashes = ['%.2f' % optrets[0].cash for optrets in results]
+
+    if not main:
+        assert periods == list(xrange(5, 45))
+        assert CHKVALUES == values
+        assert CHKCASH == cashes
+
+    else:
+        print(values)
+        print(cashes)
+
+
+class CountingData(bt.feeds.BacktraderCSVData):
+    def __init__(self):
+        self.calls = dict(start=0, preload=0, rehome=0)
+
+    def start(self):
+        self.calls['start'] += 1
+        return super(CountingData, self).start()
+
+    def preload(self):
+        self.calls['preload'] += 1
+        return super(CountingData, self).preload()
+
+    def rehome(self):
+        self.calls['rehome'] += 1
+        return super(CountingData, self).rehome()
+
+
+def test_run_loadonce(main=False):
+    # the data is parsed for the 1st combination and rehomed for the others
+    datas = list()
+    for periods in (xrange(15, 16), xrange(5, 15)):
+        data = CountingData(dataname=testcommon.getdata(0).p.dataname,
+                            fromdate=testcommon.FROMDATE,
+                            todate=testcommon.TODATE)
+        cerebro = bt.Cerebro(maxcpus=1)
+        cerebro.adddata(data)
+        cerebro.optstrategy(TestStrategy, period=periods,
+                            printdata=False, printops=False)
+        cerebro.run()
+        datas.append(data)
+
+    single, optimized = datas
+    if main:
+        print(single.calls, optimized.calls)
+
+    assert single.calls == dict(start=1, preload=1, rehome=0)
+    assert optimized.calls == dict(start=1, preload=1, rehome=9)
+
+
+def test_run_nofork(main=False):
+    # without fork the combinations are run serially in this process
+    forkcontext = bt.Cerebro.__dict__['_forkcontext']
+    bt.Cerebro._forkcontext = staticmethod(lambda: None)
+    del _chkvalues[:]
+    del _chkcash[:]
+    try:
+        datas = [testcommon.getdata(i) for i in range(chkdatas)]
+        results = testcommon.runtest(datas,
+                                     TestStrategy,
+                                     optimize=True,
+                                     maxcpus=2,
+                                     period=xrange(5, 45),
+                                     printdata=main,
+                                     printops=main,
+                                     plot=False)
+    finally:
+        bt.Cerebro._forkcontext = forkcontext
+
+    periods = [strats[0].p.period for strats in results]
+
+    if not main:
+        assert periods == list(xrange(5, 45))
+        assert CHKVALUES == _chkvalues
+        assert CHKCASH == _chkcash
+
+    else:
+        print(_chkvalues)
+        print(_chkcash)
+
+
 if __name__ == '__main__':
     test_run(main=True)
+    test_run_maxcpus(main=True)
+    test_run_loadonce(main=True)
+    test_run_nofork(main=True)
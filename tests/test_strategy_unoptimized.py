@@ -100,7 +100,7 @@ class TestStrategy(bt.Strategy):
             self.log('-------------------------')
             self.log('Starting portfolio value: %.2f' % self.broker.getvalue())
 
-        self.tstart = time.clock()
+        self.tstart = time.time()
 
         self.buycreate = list()
         self.sellcreate = list()
@@ -108,7 +108,7 @@ class TestStrategy(bt.Strategy):
         self.sellexec = list()
 
     def stop(self):
-        tused = time.clock() - self.tstart
+        tused = time.time() - self.tstart
         if self.p.printdata:
             self.log('Time used: %s' % str(tused))
             self.log('Final portfolio value: %.2f' % self.broker.getvalue())
@@ -174,5 +174,23 @@ def test_run(main=False):
                        plot=main)
 
 
+def test_run_savemem(main=False):
+    datas = [testcommon.getdata(i) for i in range(chkdatas)]
+    strats = testcommon.runtest(datas,
+                                TestStrategy,
+                                savemem=True,
+                                printdata=False,
+                                printops=main)
+
+    # the data only keeps what the strategy (SMA period 15) needs
+    maxlen = len(strats[0].data.close.array)
+    if main:
+        print('data buffer length %d for %d bars' % (maxlen, len(datas[0])))
+    else:
+        assert maxlen <= 20
+        assert len(datas[0]) == 255
+
+
 if __name__ == '__main__':
     test_run(main=True)
+    test_run_savemem(main=True)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import array
+import datetime
+import random
+
+import testcommon
+
+from backtrader.utils import (num2date, date2num, num2dates, date2nums,
+                              num2ordtime, num2ordtimes)
+from backtrader.utils.npsupport import np
+
+
+def ordtime(dt):
+    tm = dt.time()
+    daytime = (tm.hour * 60 + tm.minute) * 60 + tm.second
+    return dt.toordinal(), daytime * 1000000 + tm.microsecond
+
+
+def test_run(main=False):
+    rnd = random.Random(7)
+    base = date2num(datetime.datetime(2006, 1, 1))
+    values = [base + rnd.random() * 3650.0 for i in range(5000)]
+    # whole seconds, values at the edge of a day and the dates of the feeds
+    values += [base + rnd.randrange(86400 * 100) / 86400.0
+               for i in range(5000)]
+    values += [base + i - 1e-11 for i in range(1, 10)]
+    values += [base + i + 1e-11 for i in range(1, 10)]
+    values += [date2num(datetime.datetime(2006, 1, 2, 23, 59, 59))]
+
+    dts = [num2date(x) for x in values]
+    chkordtimes = [ordtime(dt) for dt in dts]
+    ordtimes = [num2ordtime(x) for x in values]
+    if main:
+        print('mismatches:',
+              sum(a != b for a, b in zip(ordtimes, chkordtimes)))
+
+    assert ordtimes == chkordtimes
+
+    assert num2dates(values) == dts
+    assert date2nums(dts) == array.array('d', map(date2num, dts))
+
+    if np is not None:
+        ords, daytimes = num2ordtimes(array.array('d', values))
+        assert list(zip(ords.tolist(), daytimes.tolist())) == chkordtimes
+
+
+if __name__ == '__main__':
+    test_run(main=True)
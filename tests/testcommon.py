@@ -67,9 +67,10 @@ def getdata(index, fromdate=FROMDATE, todate=TODATE):
 
 def runtest(datas, strategy,
             runonce=True, preload=True, plot=False, optimize=False,
-            **kwargs):
+            maxcpus=1, savemem=False, vectorize=False, **kwargs):
 
-    cerebro = bt.Cerebro(runonce=runonce, preload=preload)
+    cerebro = bt.Cerebro(runonce=runonce, preload=preload, maxcpus=maxcpus,
+                         savemem=savemem, vectorize=vectorize)
 
     if isinstance(datas, bt.LineSeries):
         datas = [datas]
@@ -81,10 +82,12 @@ def runtest(datas, strategy,
     else:
         cerebro.optstrategy(strategy, **kwargs)
 
-    cerebro.run()
+    results = cerebro.run()
     if plot:
         cerebro.plot()
 
+    return results
+
 
 class TestStrategy(bt.Strategy):
     params = dict(main=False,
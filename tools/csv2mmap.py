@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8; py-indent-offset:4 -*-
+###############################################################################
+#
+# Copyright (C) 2015 Daniel Rodriguez
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+
+import argparse
+import logging
+import sys
+
+
+import backtrader as bt
+import backtrader.feeds as btfeeds
+
+
+logging.basicConfig(
+    format='%(levelname)s: %(message)s',
+    level=logging.INFO)
+
+
+DATAFORMATS = dict(
+    btcsv=btfeeds.BacktraderCSVData,
+    vchartcsv=btfeeds.VChartCSVData,
+    yahoocsv=btfeeds.YahooFinanceCSVData,
+)
+
+
+def convert(infile, outfile, dataformat='btcsv', **kwargs):
+    '''
+    Parses infile with the feed of dataformat (kwargs are its params) and
+    writes the lines in the columnar format of MMapData. Returns the number
+    of bars
+    '''
+    data = DATAFORMATS[dataformat](dataname=infile, **kwargs)
+    data.start()
+    try:
+        data.preload()
+    finally:
+        data.stop()
+
+    lines = [data._getlinealias(i) for i in range(data.lines.size())]
+    columns = [line.array[:line.buflen()] for line in data.lines]
+    btfeeds.writecolumns(outfile, lines, columns)
+    return data.buflen()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Convert a CSV data file to the memory mappable format')
+
+    parser.add_argument('--infile', required=True,
+                        help='CSV file to be converted')
+
+    parser.add_argument('--format', default='btcsv',
+                        choices=sorted(DATAFORMATS.keys()),
+                        help='Format of the CSV file')
+
+    parser.add_argument('--outfile', required=True,
+                        help='Output file name')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+
+    args = parse_args()
+
+    logging.info('Converting %s' % args.infile)
+    try:
+        nbars = convert(args.infile, args.outfile, args.format)
+    except Exception as e:
+        logging.error('Converting the data failed')
+        logging.error(str(e))
+        sys.exit(1)
+
+    logging.info('%d bars written to %s' % (nbars, args.outfile))
+    sys.exit(0)